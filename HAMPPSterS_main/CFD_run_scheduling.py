@@ -10,18 +10,71 @@
 #######################################################################################################################################################################################
 
 import os
+import shutil
+import subprocess
+import shlex
 from time import sleep
 import pandas as pd
 import paramiko
 import configparser
 import warnings
 import json
+import hashlib
 import numpy as np
 import logging
+import logging.handlers
 import psutil
+import stat
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 from abc import ABC, abstractmethod
 
+### orjson serializes the parameter dictionaries faster when installed, json is kept as fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+### SSH credentials cached per config file, parsed again only when the file is modified
+class _CredCache:
+    _entries = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _entry(cls, path):
+        mtime = os.stat(path).st_mtime_ns
+        with cls._lock:
+            entry = cls._entries.get(path)
+            if entry is None or entry[0] != mtime:
+                config = configparser.ConfigParser()
+                config.read(path)
+                entry = (mtime, (config.get('SSH', 'username'), config.get('SSH', 'password')),
+                         config.get('SSH', 'keyfile', fallback=None))
+                cls._entries[path] = entry
+        return entry
+
+    @classmethod
+    def get(cls, path):
+        return cls._entry(path)[1]
+
+    ### Optional SSH key used by the rsync transfers, None if not configured
+    @classmethod
+    def keyfile(cls, path):
+        return cls._entry(path)[2]
+
+### JSON records printed by the HPC functions are delimited by the ASCII record separator
+_RS = '\x1e'
+_loads = orjson.loads if orjson is not None else json.loads
+
+### Result keys expected in the HPC records, per search type
+_RECORD_KEYS = (
+    frozenset({"jobid", "t_wait", "status", "exception"}),
+    frozenset({"t_wait", "status", "exception"}),
+    frozenset({"jobid", "t_wait", "status", "ret_bool", "exception"}),
+    )
+
 
 ################################################################################### PARAMETRIC STUDY ################################################################################
 
@@ -34,6 +87,38 @@ from abc import ABC, abstractmethod
 class SimScheduling(ABC):
     """Abstract base class for simulation scheduling."""
 
+    ### Shared qstat poller: status polls from every run in this process go to the HPC as one batched qstat.
+    ### The poller wakes when a job is registered and gathers for _poll_gather seconds so concurrent polls share the call,
+    ### it exits after _poll_idle seconds without registrations
+    _poll_registry = {}
+    _poll_thread = None
+    _poll_lock = threading.Lock()
+    _poll_wakeup = threading.Event()
+    _poll_gather = 1
+    _poll_idle = 60
+    ### The poller's own SSH session, never shared with a run's thread, closed when the poller exits
+    _poll_ssh = None
+
+    ### Workflow phases recorded in each run's state file, in order, and the job id recorded by the submission phases
+    _phases = {'submitted': 1, 'simulated': 2, 'convert_submitted': 3, 'converted': 4, 'downloaded': 5}
+    _phase_jobkeys = {'submitted': 'jobid', 'convert_submitted': 'conv_jobid'}
+
+    ### pset entries left out of the state file key: psweep bookkeeping (leading underscore) and the monitor fields
+    _state_volatile_keys = ('jobID', 'check')
+
+    ### Upper bound in seconds for a pvpython post-processing call
+    pv_timeout = 1800
+
+    ### Upper bound in seconds for an rsync download of RESULTS
+    rsync_timeout = 3600
+
+    _hpc_logins = ('login.hpc.ic.ac.uk','login-a.hpc.ic.ac.uk','login-b.hpc.ic.ac.uk','login-c.hpc.ic.ac.uk')
+
+    ### Parallel SFTP downloads: one channel per worker, with a larger window for the high-latency link to the HPC
+    _sftp_workers = 8
+    _sftp_window = 2**27
+    _sftp_packet = 2**19
+
 ############################################################################ EXCEPTION CLASSES  ###################################################################################
 
     class JobStatError(Exception):
@@ -59,6 +144,8 @@ class SimScheduling(ABC):
 
         ### Initialising Parent class attributes required for all Child Classes
         self.pset_dict = pset_dict
+        ### orjson writes nan/inf as null, so a parameter set holding them is serialized with json; checked once per run
+        self._orjson_pset = orjson is not None and not self.has_nonfinite(pset_dict)
         self.case_type = pset_dict['case']
         self.run_ID = pset_dict['run_ID']
         self.local_path = pset_dict['local_path']
@@ -71,28 +158,48 @@ class SimScheduling(ABC):
         self.save_path_runID = os.path.join(self.save_path,self.run_name)
         self.main_path = os.path.join(self.run_path,'..')
 
+        ### Bounds in seconds for the backoff between qstat polls while a job is queued
+        self.poll_min = pset_dict.get('poll_min', 15)
+        self.poll_max = pset_dict.get('poll_max', 300)
+
+        ### Opt-in: wait on convert jobs with a blocking dependent probe job instead of polling
+        self.block_wait = pset_dict.get('block_wait', False)
+
+        ### Persistent SSH session to the HPC, opened lazily and closed at the end of localrun
+        self._ssh = None
+
         for key, value in kwargs.items():
             setattr(self, key, value)
 
     ### Defining individual logging files for each run.
-    @staticmethod
-    def set_log(log_filename):
-        # Create a new logger instance for each process
-        logger = logging.getLogger(__name__)
+    def set_log(self,log_filename):
+        # Logger instance named after the run, so concurrent runs do not share handlers
+        logger = logging.getLogger(f"smx.run.{self.run_ID}")
+        logger.propagate = False
 
-        # Clear existing handlers to avoid duplication
-        logger.handlers = []
+        # Only attach a file handler the first time this run's logger is set up
+        if not logger.handlers:
+            # Bounded rotating file handler with its formatter
+            file_handler = logging.handlers.RotatingFileHandler(log_filename, maxBytes=10*1024*1024, backupCount=3)
+            formatter = logging.Formatter(fmt="%(asctime)s - %(message)s", datefmt="[%d/%m/ - %H:%M:%S]")
+            file_handler.setFormatter(formatter)
 
-        # Create a new file handler and set its formatter
-        file_handler = logging.FileHandler(log_filename)
-        formatter = logging.Formatter(fmt="%(asctime)s - %(message)s", datefmt="[%d/%m/ - %H:%M:%S]")
-        file_handler.setFormatter(formatter)
+            # Add the file handler to the logger's handlers
+            logger.addHandler(file_handler)
 
-        # Add the file handler to the logger's handlers
-        logger.addHandler(file_handler)
+        self._log = logger
 
         return logger  # Return the logger instance
 
+    ### Closing the run's log file handlers, to be called once the local run is over
+    def _close_log(self):
+        logger = getattr(self, '_log', None)
+        if logger is not None:
+            for handler in list(logger.handlers):
+                handler.close()
+                logger.removeHandler(handler)
+        self._log = None
+
     ### Checking if a pvpython process is active
     @staticmethod
     def is_pvpython_running():
@@ -110,6 +217,106 @@ class SimScheduling(ABC):
             return int(obj) 
         raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
+    ### parsing boolean values returned by the HPC functions
+    @staticmethod
+    def parse_bool(value):
+        if value is None:
+            raise TypeError('No boolean value returned from HPC')
+        return str(value).strip().lower() in ('true', '1', 'yes')
+
+    ### checking for nan/inf anywhere in a dictionary, orjson would write them as null where json writes NaN/Infinity
+    @classmethod
+    def has_nonfinite(cls,obj):
+        if isinstance(obj, (float, np.floating)):
+            return not np.isfinite(obj)
+        if isinstance(obj, dict):
+            return any(cls.has_nonfinite(value) for value in obj.values())
+        if isinstance(obj, (list, tuple)):
+            return any(cls.has_nonfinite(value) for value in obj)
+        if isinstance(obj, np.ndarray) and obj.dtype.kind in 'fc':
+            return not np.isfinite(obj).all()
+        return False
+
+    ### serializing the run's pset dictionaries passed on to the HPC functions. orjson writes compact JSON ({"a":1}) where
+    ### json.dumps writes {"a": 1}, both load to the same dictionary on the HPC side; non-str keys become str with both
+    def dumps_json(self,obj):
+        if self._orjson_pset:
+            return orjson.dumps(obj, default=self.convert_to_json,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+        return json.dumps(obj, default=self.convert_to_json, ensure_ascii=False)
+
+    ### Per-run state file recording the workflow phases already completed, so a restarted run can skip them.
+    ### The file is keyed on the run's parameter set, a state written for other parameters under the same run name is discarded
+
+    def _state_path(self):
+        return os.path.join(self.save_path_runID, 'state.json')
+
+    def pset_key(self):
+        params = {key: value for key, value in self.pset_dict.items()
+                  if not str(key).startswith('_') and key not in self._state_volatile_keys}
+        return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def load_state(self,log):
+        pset_key = self.pset_key()
+        try:
+            with open(self._state_path(), 'r') as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'pset_key': pset_key}
+
+        if state.get('pset_key') != pset_key:
+            log.info('-' * 100)
+            log.info(f'State file {self._state_path()} belongs to a different parameter set, starting the run from scratch')
+            log.info('-' * 100)
+            return {'pset_key': pset_key}
+
+        return state
+
+    def phase_done(self,phase,log=None):
+        done = self.state.get('phase_rank', 0) >= self._phases[phase]
+        if done and log is not None:
+            log.info('-' * 100)
+            log.info(f'Skipping phase {phase}, already completed according to the state file')
+        return done
+
+    def save_state(self,phase,**fields):
+        self.state.update(fields)
+        ### Phases never move backwards, e.g. a resubmission after restart keeps the run at 'submitted'
+        if self._phases[phase] >= self.state.get('phase_rank', 0):
+            self.state['phase'] = phase
+            self.state['phase_rank'] = self._phases[phase]
+
+        os.makedirs(self.save_path_runID, exist_ok=True)
+        tmp_path = self._state_path() + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.state, file)
+        os.replace(tmp_path, self._state_path())
+
+    ### Picking up the job recorded for a submission phase, jobmonitor polls it as queued and updates its actual status.
+    ### A recorded job unknown to qstat (PBS history purged) has finished: it is resumed as F, so the run goes on to
+    ### job_restart or the download instead of resubmitting into an existing run folder. None if the phase is not recorded
+
+    def resume_job(self,phase,log):
+        if not self.phase_done(phase):
+            return None
+
+        jobid = self.state[self._phase_jobkeys[phase]]
+        ### Only a job still being waited on is checked, once the next phase is recorded the job id is not used again
+        known = True
+        if self.state['phase_rank'] == self._phases[phase]:
+            try:
+                known = str(jobid) in self.batch_qstat([str(jobid)], log)
+            except (paramiko.AuthenticationException, paramiko.SSHException, ValueError) as e:
+                log.info(f'Could not check job id {jobid} recorded in the state file: {e}, resuming it as recorded')
+
+        log.info('-' * 100)
+        log.info(f'Resuming run from state file at phase {self.state["phase"]}, job id: {jobid}')
+        if not known:
+            log.info(f'Job id {jobid} is no longer known to qstat, treating it as finished')
+        log.info('-' * 100)
+
+        return (jobid, 1, 'Q') if known else (jobid, 0, 'F')
+
     # Local run abstract method to enforce on child class
     @abstractmethod
     def localrun(self,pset_dict):
@@ -117,19 +324,31 @@ class SimScheduling(ABC):
     
     ### calling monitoring and restart function to check in on jobs
 
-    def jobmonitor(self, t_wait, status, jobid, run, HPC_script,log):
+    def jobmonitor(self, t_wait, status, jobid, run, HPC_script,log, poll_min=15, poll_max=300):
 
         running = True
         chk_counter = 0
         csv_check = True # Option to deactivate csv checks and only run qstat
+        interval = poll_min # Backoff interval between qstat polls, reset on every status change
+        mdict_str = None
+        mdict_jobid = None
+
+        ### Convert jobs need no runtime checks, a blocking probe returns once they are done
+        if self.block_wait and 'Convert' in run and t_wait > 0 and self.block_until_done(jobid, log):
+            log.info('-' * 100)
+            log.info(f'JOB {run} FINISHED')
+            log.info('-' * 100)
+            running = False
         
         while running:
             
-            ### Setting updated dictionary with jobid from submitted job and csv_check logical gate
-            mdict = self.pset_dict
-            mdict['jobID'] = jobid
-            mdict['check'] = csv_check
-            mdict_str = json.dumps(mdict, default=self.convert_to_json, ensure_ascii=False)
+            ### Setting updated dictionary with jobid from submitted job and csv_check logical gate, serialized again only when the jobid changes
+            if mdict_str is None or jobid != mdict_jobid:
+                mdict = self.pset_dict
+                mdict['jobID'] = jobid
+                mdict['check'] = csv_check
+                mdict_str = self.dumps_json(mdict)
+                mdict_jobid = jobid
                         
             ### If t_wait>0, job is either running or queieng
             if t_wait>0:
@@ -138,15 +357,27 @@ class SimScheduling(ABC):
                 if (status == 'Q' or status == 'H' or (status == 'R' and 'Convert' in run)):
                     ### If Q or H, wait and qstat later
                     log.info('-' * 100)
-                    log.info(f'Job {run} with id: {jobid} has status {status}. Sleeping for:{t_wait/60} mins')
+                    log.info(f'Job {run} with id: {jobid} has status {status}. Sleeping for:{interval/60} mins')
                     log.info('-' * 100)
-                    sleep(t_wait)
+                    sleep(max(1, interval))
                     try:
+                        ### Batched qstat is enough to know whether a queued or converting job changed status
+                        if status != 'H' and self.poll_status(jobid, log) == status:
+                            interval = max(poll_min, min(poll_max, interval * 1.5))
+                            log.info(f'Job {run} with id {jobid} still has status {status}')
+                            continue
+
                         ### Execute monitor function in HPC to check job status
-                        command = f'python {self.main_path}/{HPC_script} monitor --pdict \'{mdict_str}\' --study \'{str(self.study_ID)}\''
+                        command = f'python {self.main_path}/{HPC_script} monitor --pdict - --study \'{str(self.study_ID)}\''
                         new_jobid, new_t_wait, new_status, _ = self.execute_remote_command(
-                            command=command,search=0,log=log
+                            command=command,pdict_str=mdict_str,search=0,log=log
                             )
+
+                        ### Back off exponentially while the status holds, poll quickly again after a transition
+                        if new_status != status:
+                            interval = poll_min
+                        else:
+                            interval = max(poll_min, min(poll_max, interval * 1.5))
                         
                         ### update t_wait and job status accordingly
                         t_wait = new_t_wait
@@ -154,7 +385,7 @@ class SimScheduling(ABC):
                         jobid = new_jobid
 
                         log.info('-' * 100)
-                        log.info(f'Job {run} with id {jobid} status is {status}. Updated sleeping time: {t_wait/60} mins')
+                        log.info(f'Job {run} with id {jobid} status is {status}. Updated sleeping time: {interval/60} mins')
                     except (SimScheduling.JobStatError, ValueError, NameError) as e:  
                         if isinstance(e, SimScheduling.JobStatError):
 
@@ -204,9 +435,9 @@ class SimScheduling(ABC):
 
                     try:
                         ### Execute monitor function in HPC to check job status
-                        command = f'python {self.main_path}/{HPC_script} monitor --pdict \'{mdict_str}\' --study \'{str(self.study_ID)}\''
+                        command = f'python {self.main_path}/{HPC_script} monitor --pdict - --study \'{str(self.study_ID)}\''
                         _, run_t_wait, run_status, _ = self.execute_remote_command(
-                            command=command,search=0,log=log
+                            command=command,pdict_str=mdict_str,search=0,log=log
                             )
                         
                         status = run_status
@@ -243,89 +474,256 @@ class SimScheduling(ABC):
             else:
                 running = False
 
-    ### Executing HPC functions remotely via Paramiko SSH library.
+    ### Submitting a probe job depending on jobid with qsub -W block=true, so the SSH exec only returns once jobid has ended.
+    ### Returns False if the probe could not be submitted, leaving jobmonitor to poll as usual
 
-    def execute_remote_command(self,command,search,log):
+    def block_until_done(self,jobid,log):
+        command = (f'qsub -W block=true -W depend=afterany:{jobid} -l walltime=00:01:00 '
+                   f'-l select=1:ncpus=1:mem=1gb -j oe -o /dev/null -- /bin/true')
 
-        ### Read SSH configuration from config file
-        config = configparser.ConfigParser()
-        configfile = os.path.join(self.local_path, f'config_{self.usr}.ini')
-        config.read(configfile)
-        user = config.get('SSH', 'username')
-        key = config.get('SSH', 'password')
-        try_logins = ['login.hpc.ic.ac.uk','login-a.hpc.ic.ac.uk','login-b.hpc.ic.ac.uk','login-c.hpc.ic.ac.uk']
+        log.info('-' * 100)
+        log.info(f'Blocking on probe job until job {jobid} finishes')
 
-        ### Initialize variables for result storage
-        jobid, t_wait, status, ret_bool = None, 0, None, None
-        exc = None
+        stdin, stdout, stderr = self._with_ssh(lambda ssh: ssh.exec_command(command), log)
+
+        try:
+            exit_status = stdout.channel.recv_exit_status()
+            if exit_status != 0:
+                log.info(f'Blocking probe failed with message: {stderr.read().decode().strip()}, falling back to polling')
+                return False
+        finally:
+            stdin.close()
+            stdout.close()
+            stderr.close()
+
+        return True
+
+    ### Registering a job in the shared poller and waiting for its status from the next batched qstat
+
+    def poll_status(self,jobid,log):
+
+        with SimScheduling._poll_lock:
+            entry = SimScheduling._poll_registry.get(str(jobid))
+            if entry is None:
+                entry = (Future(), self, log)
+                SimScheduling._poll_registry[str(jobid)] = entry
+            SimScheduling._poll_wakeup.set()
+            if SimScheduling._poll_thread is None:
+                SimScheduling._poll_thread = threading.Thread(target=SimScheduling._poll_loop, daemon=True)
+                SimScheduling._poll_thread.start()
+
+        try:
+            return entry[0].result(timeout=SimScheduling._poll_gather + 120)
+        except FutureTimeoutError:
+            log.info(f'Batched qstat for job {jobid} timed out, falling back to HPC monitor')
+            return None
+
+    ### Poller thread: woken by each registration, snapshots the pending jobids and resolves them with a single qstat
+
+    @classmethod
+    def _poll_loop(cls):
+
+        while True:
+            if cls._poll_wakeup.wait(cls._poll_idle):
+                sleep(cls._poll_gather)
+
+            with cls._poll_lock:
+                cls._poll_wakeup.clear()
+                pending = dict(cls._poll_registry)
+                cls._poll_registry.clear()
+                if not pending:
+                    cls._poll_thread = None
+                    if cls._poll_ssh is not None:
+                        cls._poll_ssh.close()
+                        cls._poll_ssh = None
+                    return
+
+            ### Any registered run lends its credentials, the batch runs on the poller's own session
+            _, owner, log = next(iter(pending.values()))
+
+            try:
+                if cls._poll_ssh is None or not cls._ssh_alive(cls._poll_ssh):
+                    if cls._poll_ssh is not None:
+                        cls._poll_ssh.close()
+                    cls._poll_ssh = owner._connect_ssh(log)
+                statuses = owner.batch_qstat(list(pending), log, ssh=cls._poll_ssh)
+            except Exception as e:
+                ### a session that failed is reopened for the next batch
+                if isinstance(e, paramiko.SSHException) and cls._poll_ssh is not None:
+                    cls._poll_ssh.close()
+                    cls._poll_ssh = None
+                ### jobmonitor handles SSH errors, any other failure (e.g. unparsable qstat output) is reported as one
+                if not isinstance(e, paramiko.SSHException):
+                    wrapped = paramiko.SSHException(f'Batched qstat failed: {e!r}')
+                    wrapped.__cause__ = e
+                    e = wrapped
+                for future, _, _ in pending.values():
+                    future.set_exception(e)
+                continue
+
+            ### Jobs missing from qstat have finished or been removed from the queue
+            for jobid, (future, _, _) in pending.items():
+                future.set_result(statuses.get(jobid, 'F'))
+
+    ### Running one qstat on the login node for several jobs and mapping each jobid to its status, on the given session
+    ### or the run's own. -x keeps finished jobs in the output with their F state, as in the HPC side _qstat_job
+
+    def batch_qstat(self,jobids,log,ssh=None):
+
+        command = 'qstat -x -f -F json ' + ' '.join(jobids)
+        if ssh is not None:
+            stdin, stdout, stderr = ssh.exec_command(command)
+        else:
+            stdin, stdout, stderr = self._with_ssh(lambda ssh: ssh.exec_command(command), log)
+
+        try:
+            output = stdout.read()
+        finally:
+            stdin.close()
+            stdout.close()
+            stderr.close()
+
+        ### qstat still reports the known jobs when some ids are unknown, so the exit code is not checked
+        jobs = _loads(output or b'{}').get('Jobs', {})
+
+        return {full_id.split('.')[0]: info.get('job_state') for full_id, info in jobs.items()}
+
+    ### Opening the SSH session to the HPC once and reusing it across remote commands and downloads
+
+    def _get_ssh(self,log):
+
+        ### Reuse the cached session while its transport is still alive
+        if self._ssh is not None:
+            if self._ssh_alive(self._ssh):
+                return self._ssh
+            self._close_ssh()
+
+        self._ssh = self._connect_ssh(log)
+        return self._ssh
+
+    @staticmethod
+    def _ssh_alive(ssh):
+        transport = ssh.get_transport()
+        return transport is not None and transport.is_active()
+
+    ### Opening a new SSH session to the first HPC login node that accepts it
+
+    def _connect_ssh(self,log):
+
+        ### SSH configuration from config file, parsed again only if edited
+        user, key = _CredCache.get(os.path.join(self.local_path, f'config_{self.usr}.ini'))
+
+        try_logins = self._hpc_logins
 
         for login in try_logins:
 
-            ### Establish an SSH connection using a context manager
             ssh = paramiko.SSHClient()
             ssh.load_system_host_keys()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             warnings.filterwarnings("ignore", category=ResourceWarning)
 
             try:
-                ssh.connect(login, username=user, password=key)
-
-                stdin, stdout, stderr = ssh.exec_command(command)
-                out_lines = []
-                for line in stdout:
-                    stripped_line = line.strip()
-                    log.info(stripped_line)
-                    out_lines.append(stripped_line)
-                
-                ### Extracting exceptions, job id, job wait time, status and restart condition
-                results = self.search(out_lines=out_lines,search=search)
-
-                jobid = results.get("jobid", None)
-                t_wait = float(results.get("t_wait", 0))
-                status = results.get("status", None)
-                ret_bool = results.get("ret_bool", None)
-                exc = results.get("exception",None)
-
-                ### Handle exceptions
-                if exc is not None:
-                    if exc == "JobStatError":
-                        raise SimScheduling.JobStatError('qstat output empty, job finished or deleted from HPC run queue')
-                    elif exc == "ValueError":
-                        raise ValueError('Exception raised from job sh creation, qstat in job_wait \
-                                         or attempting to search restart in job_restart')
-                    elif exc == "FileNotFoundError":
-                        raise FileNotFoundError('File not found: either .out or .csv files not found when attempting restart \
-                                                or vtk/pvd/convert files not found when attempting to convert')
-                    elif exc == "ConvergenceError":
-                        raise SimScheduling.ConvergenceError('Convergence checks on HPC failed, job killed as a result')
-                    elif exc == "BadTerminationError":
-                        raise SimScheduling.BadTerminationError("Job run ended with a bad termination error message in the output file. Check convergence or setup issues")
-                    elif exc == 'KeyError':
-                        raise KeyError('Error while attempting to restart: Stop condition key name does not exist in the CSV file checked')
-                    else:
-                        raise NameError('Search for exception from log failed')
-                    
-                if stdin is not None:
-                    break
-
+                ssh.connect(login, username=user, password=key,
+                            banner_timeout=30, auth_timeout=30, timeout=30)
             except (paramiko.AuthenticationException, paramiko.SSHException) as e:
+                ssh.close()
                 if login == try_logins[-1]:
                     raise e
                 else:
                     log.info(f'SSH connection failed with login {login}, trying again ...')
                     continue
 
-            ### Closing HPC session
-            finally:
-                if 'stdin' in locals():
-                    stdin.close()
-                if 'stdout' in locals():
-                    stdout.close()
-                if 'stderr' in locals():
-                    stderr.close()
-                ssh.close()
+            ### Keepalive packets stop the login node from dropping the session between polls
+            ssh.get_transport().set_keepalive(30)
+            return ssh
+
+    ### Closing the cached HPC session, to be called once the local run is over
+
+    def _close_ssh(self):
+        if getattr(self, '_ssh', None) is not None:
+            self._ssh.close()
+        self._ssh = None
+
+    ### Opening an SFTP channel with the tuned window and packet sizes
+
+    def _open_sftp(self,transport):
+        return paramiko.SFTPClient.from_transport(transport, window_size=self._sftp_window,
+                                                  max_packet_size=self._sftp_packet)
+
+    ### Running an action on the cached session, reconnecting once if the HPC dropped it
+
+    def _with_ssh(self,action,log):
+        try:
+            return action(self._get_ssh(log))
+        except paramiko.AuthenticationException as e:
+            raise e
+        except paramiko.SSHException:
+            log.info('SSH session lost, reconnecting ...')
+            self._close_ssh()
+            return action(self._get_ssh(log))
+
+    ### Executing HPC functions remotely via Paramiko SSH library.
+
+    def execute_remote_command(self,command,search,log,pdict_str=None):
+
+        ### Initialize variables for result storage
+        jobid, t_wait, status, ret_bool = None, 0, None, None
+        exc = None
+
+        stdin, stdout, stderr = self._with_ssh(lambda ssh: ssh.exec_command(command), log)
+
+        try:
+            ### Parameter dictionary goes through stdin (--pdict -), keeping the remote command line short
+            if pdict_str is not None:
+                stdin.write(pdict_str)
+                stdin.channel.shutdown_write()
+
+            ### Extracting exceptions, job id, job wait time, status and restart condition while stdout streams in
+            results = self.search(out_lines=self._stream_lines(stdout,log),search=search)
+
+            jobid = results.get("jobid", None)
+            t_wait = float(results.get("t_wait", 0))
+            status = results.get("status", None)
+            ret_bool = results.get("ret_bool", None)
+            exc = results.get("exception",None)
+
+            ### Handle exceptions
+            if exc is not None:
+                if exc == "JobStatError":
+                    raise SimScheduling.JobStatError('qstat output empty, job finished or deleted from HPC run queue')
+                elif exc == "ValueError":
+                    raise ValueError('Exception raised from job sh creation, qstat in job_wait \
+                                     or attempting to search restart in job_restart')
+                elif exc == "FileNotFoundError":
+                    raise FileNotFoundError('File not found: either .out or .csv files not found when attempting restart \
+                                            or vtk/pvd/convert files not found when attempting to convert')
+                elif exc == "ConvergenceError":
+                    raise SimScheduling.ConvergenceError('Convergence checks on HPC failed, job killed as a result')
+                elif exc == "BadTerminationError":
+                    raise SimScheduling.BadTerminationError("Job run ended with a bad termination error message in the output file. Check convergence or setup issues")
+                elif exc == 'KeyError':
+                    raise KeyError('Error while attempting to restart: Stop condition key name does not exist in the CSV file checked')
+                else:
+                    raise NameError('Search for exception from log failed')
+
+        ### Closing command channel, also when search stopped before EOF. The SSH session itself is kept open
+        finally:
+            stdin.close()
+            stdout.close()
+            stderr.close()
+            stdout.channel.close()
         
         return jobid, t_wait, status, ret_bool
+
+    ### Logging remote output line by line as it arrives
+
+    @staticmethod
+    def _stream_lines(stdout,log):
+        for line in stdout:
+            # Record separators count as whitespace for str.strip, only trim blanks and line endings
+            stripped_line = line.strip(' \t\r\n')
+            log.info(stripped_line)
+            yield stripped_line
  
     ### Search and extract communications from the functions executed remotely on the HPC
 
@@ -335,38 +733,18 @@ class SimScheduling(ABC):
         ##### search = 1 : looks for wait time, status
         ##### search = 2 : looks for JobID, status and wait time and boolean return values
 
-        ### Define markers and corresponding result keys for different search types
-        if search == 0:
-            markers = {
-                "====JOB_IDS====": "jobid",
-                "====WAIT_TIME====": "t_wait",
-                "====JOB_STATUS====": "status",
-                "====EXCEPTION====" : "exception"
-                }
-        elif search == 1:
-            markers = {
-                "====WAIT_TIME====": "t_wait",
-                "====JOB_STATUS====": "status",
-                "====EXCEPTION====" : "exception"
-                }
-        elif search == 2:
-            markers = {
-                "====JOB_IDS====": "jobid",
-                "====WAIT_TIME====": "t_wait",
-                "====JOB_STATUS====": "status",
-                "====RETURN_BOOL====": "ret_bool",
-                "====EXCEPTION====" : "exception"
-                }
-            
+        keys = _RECORD_KEYS[search]
         results = {}
-        current_variable = None
-
-        for idx, line in enumerate(out_lines):
-            if line in markers:
-                current_variable = markers[line]
-                # Store the value associated with the marker as the value of the current variable
-                results[current_variable] = out_lines[idx + 1]
 
+        for line in out_lines:
+            # Any other output from the HPC functions is only logged
+            if line.count(_RS) < 2:
+                continue
+            record = _loads(line.split(_RS)[1])
+            results.update((key, value) for key, value in record.items() if key in keys)
+            # Every key found, no need to wait for the rest of the output
+            if len(results) == len(keys):
+                break
 
         return results
 
@@ -376,81 +754,101 @@ class SimScheduling(ABC):
 
         ephemeral_path = f'/rds/general/user/{self.usr}/ephemeral/'
 
-        try:
-            os.mkdir(self.save_path_runID)
-            if hasattr(self, 'save_path_runID_post'):
-                os.mkdir(self.save_path_runID_post)
-
-            log.info(f'Saving folder created at {self.save_path}')
-        except:
-            pass
+        os.makedirs(self.save_path_runID, exist_ok=True)
+        if hasattr(self, 'save_path_runID_post'):
+            os.makedirs(self.save_path_runID_post, exist_ok=True)
 
-        ### Config file with keys to login to the HPC
-        config = configparser.ConfigParser()
-        configfile = os.path.join(self.local_path, f'config_{self.usr}.ini')
-        config.read(configfile)
-        user = config.get('SSH', 'username')
-        key = config.get('SSH', 'password')
-        try_logins = ['login.hpc.ic.ac.uk','login-a.hpc.ic.ac.uk','login-b.hpc.ic.ac.uk','login-c.hpc.ic.ac.uk']
+        log.info(f'Saving folder ensured at {self.save_path_runID}')
 
-        for login in try_logins:
-            
-            ### Establish an SSH connection using a context manager
-            ssh = paramiko.SSHClient()
-            ssh.load_system_host_keys()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            warnings.filterwarnings("ignore", category=ResourceWarning)
+        if hasattr(self, 'save_path_runID_post'):
+            local_path = self.save_path_runID_post
+        else:
+            local_path = self.save_path_runID
 
-            try:
-                ssh.connect(login, username=user, password=key)
-                stdin, _, _ = ssh.exec_command("echo 'SSH connection test'")
-                transport = ssh.get_transport()
-                sftp = paramiko.SFTPClient.from_transport(transport)
+        remote_path = os.path.join(ephemeral_path,self.run_name,'RESULTS')
 
-                remote_path = os.path.join(ephemeral_path,self.run_name,'RESULTS')
-                remote_files = sftp.listdir_attr(remote_path)
+        ### rsync only transfers what changed since the last download, SFTP is kept as fallback
+        if self._rsync_download(remote_path, local_path, log):
+            log.info('-' * 100)
+            log.info(f'Files successfully synced at {self.save_path}')
+            log.info('-' * 100)
+            log.info('-' * 100)
+            return
+
+        sftp = self._with_ssh(lambda ssh: self._open_sftp(ssh.get_transport()), log)
+        clients = [sftp]
+        clients_lock = threading.Lock()
+        thread_sftp = threading.local()
+
+        ### Each worker thread downloads over its own SFTP channel on the shared transport
+        def fetch(file_attr):
+            remote_file_path = os.path.join(remote_path, file_attr.filename)
+            local_file_path = os.path.join(local_path, file_attr.filename)
+
+            # Skip files already downloaded on a previous attempt
+            if os.path.exists(local_file_path):
+                local_stat = os.stat(local_file_path)
+                if local_stat.st_size == file_attr.st_size and int(local_stat.st_mtime) == file_attr.st_mtime:
+                    return
+
+            client = getattr(thread_sftp, 'client', None)
+            if client is None:
+                client = self._open_sftp(sftp.get_channel().get_transport())
+                thread_sftp.client = client
+                with clients_lock:
+                    clients.append(client)
+
+            client.get(remote_file_path, local_file_path)
+            # Keeping the remote modification time so re-downloads can be skipped
+            if file_attr.st_mtime is not None:
+                os.utime(local_file_path, (file_attr.st_atime or file_attr.st_mtime, file_attr.st_mtime))
 
-                for file_attr in remote_files:
-                    remote_file_path = os.path.join(remote_path, file_attr.filename)
+        try:
+            remote_files = sftp.listdir_attr(remote_path)
 
-                    if hasattr(self, 'save_path_runID_post'):
-                        local_file_path = os.path.join(self.save_path_runID_post, file_attr.filename)
-                    else:
-                        local_file_path = os.path.join(self.save_path_runID, file_attr.filename)
+            # Only regular files are copied
+            regular_files = [f for f in remote_files if stat.S_ISREG(f.st_mode)]
 
-                    # Check if it's a regular file before copying
-                    if file_attr.st_mode & 0o100000:
-                        sftp.get(remote_file_path, local_file_path)
+            with ThreadPoolExecutor(max_workers=self._sftp_workers) as executor:
+                list(executor.map(fetch, regular_files))
 
-                log.info('-' * 100)
-                log.info(f'Files successfully copied at {self.save_path}')
+            log.info('-' * 100)
+            log.info(f'Files successfully copied at {self.save_path}')
 
-                if stdin is not None:
-                    break
+        ### closing SFTP channels, the SSH session itself is kept open
+        finally:
+            for client in clients:
+                client.close()
                 
-            except (paramiko.AuthenticationException, paramiko.SSHException) as e:
-                if login == try_logins[-1]:
-                    raise e
-                else:
-                    log.info(f'SSH connection failed with login {login}, trying again ...')
-                    continue
+        log.info('-' * 100)
+        log.info('-' * 100)
 
-            ### closing HPC session
-            finally:
-                if 'sftp' in locals():
-                    sftp.close()
-                if 'stdin' in locals():
-                    stdin.close()
-                if 'ssh' in locals():
-                    ssh.close()
-                    
-            log.info('-' * 100)
-            log.info('-' * 100)
+    ### Delta download of the remote RESULTS folder with rsync over ssh, needs rsync locally and an SSH key in the config file
+
+    def _rsync_download(self,remote_path,local_path,log):
+        configfile = os.path.join(self.local_path, f'config_{self.usr}.ini')
+        keyfile = _CredCache.keyfile(configfile)
 
+        if keyfile is None or shutil.which('rsync') is None:
+            return False
 
-################################################################################################################################################################################
+        user, _ = _CredCache.get(configfile)
+
+        # Regular files only, subfolders in RESULTS are not copied
+        command = ['rsync', '-az', '--partial', '--inplace', '--exclude=*/',
+                   '-e', f'ssh -i {shlex.quote(keyfile)} -o BatchMode=yes',
+                   f'{user}@{self._hpc_logins[0]}:{remote_path}/', f'{local_path}/']
+        try:
+            subprocess.run(command, check=True, capture_output=True, text=True, timeout=self.rsync_timeout)
+        except subprocess.CalledProcessError as e:
+            log.info(f'rsync failed with message: {e.stderr.strip()}, falling back to SFTP')
+            return False
+        except subprocess.TimeoutExpired:
+            log.info(f'rsync did not finish within {self.rsync_timeout} s, falling back to SFTP')
+            return False
 
-################################################################################### JOB MONITORING ###########################################################################
+        return True
+ ###########################################################################
 
 ################################################################################# Author: Paula Pico #########################################################################
 
@@ -477,77 +875,82 @@ class SimMonitoring(SimScheduling):
         super().__init__(pset_dict,save_path_csv = save_path_csv,
                          jobID=jobID)
     
-        ### Logger set-up
-        log_filename = f"output_{self.run_name}.txt"
-        log = self.set_log(log_filename)
-        dict_str = json.dumps(pset_dict, default=self.convert_to_json, ensure_ascii=False)
+        try:
+            ### Logger set-up
+            log_filename = f"output_{self.run_name}.txt"
+            log = self.set_log(log_filename)
+            dict_str = self.dumps_json(pset_dict)
 
-        HPC_script = 'HPC_run_scheduling.py'
+            HPC_script = 'HPC_run_scheduling.py'
 
-        ##Initial values
-        t_wait = 1
-        status = 'I'
-        jobid = self.jobID
+            ##Initial values
+            t_wait = 1
+            status = 'I'
+            jobid = self.jobID
 
-        restart = True
-        while restart:
+            restart = True
+            while restart:
 
-            ### job monitoring loop
+                ### job monitoring loop
 
-            log.info('-' * 100)
-            log.info('JOB MONITORING')
-            log.info('-' * 100)
+                log.info('-' * 100)
+                log.info('JOB MONITORING')
+                log.info('-' * 100)
 
-            try:
-                self.jobmonitor(t_wait, status, jobid, self.run_ID, HPC_script,log)
-            except (ValueError, FileNotFoundError,NameError,SimScheduling.ConvergenceError) as e:
-                log.info(f'Exited with message: {e}')
-                return {}
-            except (paramiko.AuthenticationException, paramiko.SSHException) as e:
-                log.info(f"Authentication failed: {e}")
-                return {}
+                try:
+                    self.jobmonitor(t_wait, status, jobid, self.run_ID, HPC_script,log,
+                                    poll_min=self.poll_min, poll_max=self.poll_max)
+                except (ValueError, FileNotFoundError,NameError,SimScheduling.ConvergenceError) as e:
+                    log.info(f'Exited with message: {e}')
+                    return {}
+                except (paramiko.AuthenticationException, paramiko.SSHException) as e:
+                    log.info(f"Authentication failed: {e}")
+                    return {}
             
 
-            ### Downloading csv file
-
-            log.info('-' * 100)
-            log.info('DOWNLOADING .csv FILE')
-            log.info('-' * 100)
+                ### Downloading csv file
 
-            try:
-                self.copy_csv(log)
-            except (paramiko.AuthenticationException, paramiko.SSHException) as e:
-                log.info(f"SSH ERROR: Authentication failed: {e}")
-                return {}
+                log.info('-' * 100)
+                log.info('DOWNLOADING .csv FILE')
+                log.info('-' * 100)
 
-            ### Job restart execution
+                try:
+                    self.copy_csv(log)
+                except (paramiko.AuthenticationException, paramiko.SSHException) as e:
+                    log.info(f"SSH ERROR: Authentication failed: {e}")
+                    return {}
 
-            log.info('-' * 100)
-            log.info('JOB RESTARTING')
-            log.info('-' * 100)
+                ### Job restart execution
 
-            try:
                 log.info('-' * 100)
-                command = f'python {self.main_path}/{HPC_script} job_restart --pdict \'{dict_str}\' --study \'{str(self.study_ID)}\''
-                new_jobID, new_t_wait, new_status, ret_bool = self.execute_remote_command(
-                    command=command, search=2, log=log
-                    )
-
+                log.info('JOB RESTARTING')
                 log.info('-' * 100)
 
-                ### updating
-                jobid = new_jobID
-                t_wait = new_t_wait
-                status = new_status
-                restart = eval(ret_bool)
+                try:
+                    log.info('-' * 100)
+                    command = f'python {self.main_path}/{HPC_script} job_restart --pdict - --study \'{str(self.study_ID)}\''
+                    new_jobID, new_t_wait, new_status, ret_bool = self.execute_remote_command(
+                        command=command, pdict_str=dict_str, search=2, log=log
+                        )
+
+                    log.info('-' * 100)
 
-            except (ValueError,FileNotFoundError,NameError,
-                    SimScheduling.BadTerminationError,SimScheduling.JobStatError,TypeError,KeyError) as e:
-                log.info(f'Exited with message: {e}')
-                return {}
-            except (paramiko.AuthenticationException, paramiko.SSHException) as e:
-                log.info(f"Authentication failed: {e}")
-                return {}
+                    ### updating
+                    jobid = new_jobID
+                    t_wait = new_t_wait
+                    status = new_status
+                    restart = self.parse_bool(ret_bool)
+
+                except (ValueError,FileNotFoundError,NameError,
+                        SimScheduling.BadTerminationError,SimScheduling.JobStatError,TypeError,KeyError) as e:
+                    log.info(f'Exited with message: {e}')
+                    return {}
+                except (paramiko.AuthenticationException, paramiko.SSHException) as e:
+                    log.info(f"Authentication failed: {e}")
+                    return {}
+        finally:
+            self._close_ssh()
+            self._close_log()
             
     ### Function to copy the csv file. To be executed at the end of every run
 
@@ -555,80 +958,45 @@ class SimMonitoring(SimScheduling):
 
         ephemeral_path = f'/rds/general/user/{self.usr}/ephemeral/'
 
-        ### Config file with keys to login to the HPC
-        config = configparser.ConfigParser()
-        configfile = os.path.join(self.local_path, f'config_{self.usr}.ini')
-        config.read(configfile)
-        user = config.get('SSH', 'username')
-        key = config.get('SSH', 'password')
-        try_logins = ['login.hpc.ic.ac.uk','login-a.hpc.ic.ac.uk','login-b.hpc.ic.ac.uk','login-c.hpc.ic.ac.uk']
+        sftp = self._with_ssh(lambda ssh: ssh.open_sftp(), log)
 
-        for login in try_logins:
-            
-            ### Establish an SSH connection using a context manager
-            ssh = paramiko.SSHClient()
-            ssh.load_system_host_keys()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            warnings.filterwarnings("ignore", category=ResourceWarning)
+        try:
+            remote_path = os.path.join(ephemeral_path,self.run_name)
 
+            # Trying to Find .csv file in EPHEMERAL
             try:
-                ssh.connect(login, username=user, password=key)
-                stdin, _, _ = ssh.exec_command("echo 'SSH connection test'")
-                transport = ssh.get_transport()
-                sftp = paramiko.SFTPClient.from_transport(transport)
-                remote_path = os.path.join(ephemeral_path,self.run_name)
                 remote_files = sftp.listdir(remote_path)
+                csv_files = [file for file in remote_files if 
+                             file.endswith(f'{self.run_name}.csv' 
+                                           if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv')]
 
-                # Trying to Find .csv file in EPHEMERAL
-                try:
-                    remote_files = sftp.listdir(remote_path)
-                    csv_files = [file for file in remote_files if 
-                                 file.endswith(f'{self.run_name}.csv' 
-                                               if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv')]
-
-                    # If csv is found. Create a directory named with current date in "temporal", copy the csv there and rename it to: *_{today_date}.csv
-                    if csv_files:
-                        log.info('-' * 100)
-                        log.info(f"*.csv file found in remote directory")
-                        log.info('-' * 100)
-                        today_date = datetime.now().strftime("%d%m%y")
-                        target_directory = os.path.join(self.save_path_csv, today_date)
-                        os.makedirs(target_directory, exist_ok=True)
-                        log.info(f"Directory {today_date} created")
-
-                        for csv_file in csv_files:
-                            new_csv_file_name = f"{os.path.splitext(csv_file)[0]}_{today_date}.csv"
-                            remote_file_path = os.path.join(remote_path, csv_file)
-                            local_file_path = os.path.join(target_directory, new_csv_file_name)
-                            sftp.get(remote_file_path, local_file_path)
-                            log.info(f"File {new_csv_file_name} copied and renamed")
-                    else:
-                        # If no csv file is found. Continue with the job restarting process and issue a warning
-                        log.info('-' * 100)
-                        log.info("WARNING: No csv files found to copy. Simulation will be restarted but please check")
-                        log.info('-' * 100)
-                finally:
+                # If csv is found. Create a directory named with current date in "temporal", copy the csv there and rename it to: *_{today_date}.csv
+                if csv_files:
                     log.info('-' * 100)
-                    log.info("Restarting process will begin")
+                    log.info(f"*.csv file found in remote directory")
                     log.info('-' * 100)
-
-                if stdin is not None:
-                    break
-
-            except (paramiko.AuthenticationException, paramiko.SSHException) as e:
-                if login == try_logins[-1]:
-                    raise e
+                    today_date = datetime.now().strftime("%d%m%y")
+                    target_directory = os.path.join(self.save_path_csv, today_date)
+                    os.makedirs(target_directory, exist_ok=True)
+                    log.info(f"Directory {today_date} created")
+
+                    for csv_file in csv_files:
+                        new_csv_file_name = f"{os.path.splitext(csv_file)[0]}_{today_date}.csv"
+                        remote_file_path = os.path.join(remote_path, csv_file)
+                        local_file_path = os.path.join(target_directory, new_csv_file_name)
+                        sftp.get(remote_file_path, local_file_path)
+                        log.info(f"File {new_csv_file_name} copied and renamed")
                 else:
-                    log.info(f'SSH connection failed with login {login}, trying again ...')
-                    continue
-
-            ### closing HPC session
+                    # If no csv file is found. Continue with the job restarting process and issue a warning
+                    log.info('-' * 100)
+                    log.info("WARNING: No csv files found to copy. Simulation will be restarted but please check")
+                    log.info('-' * 100)
             finally:
-                if 'sftp' in locals():
-                    sftp.close()
-                if 'stdin' in locals():
-                    stdin.close()
-                if 'ssh' in locals():
-                    ssh.close()
-        return True
+                log.info('-' * 100)
+                log.info("Restarting process will begin")
+                log.info('-' * 100)
 
+        ### closing SFTP channel, the SSH session itself is kept open
+        finally:
+            sftp.close()
+        return True
\ No newline at end of file
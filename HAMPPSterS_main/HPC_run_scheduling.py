@@ -10,21 +10,31 @@
 #######################################################################################################################################################################################
 
 import os
-from subprocess import Popen, PIPE
-from time import sleep
+import sys
+from subprocess import PIPE
 import pandas as pd
 import shutil
 import glob
 import math
-import datetime
 import subprocess
 import re
 import argparse
+import asyncio
+import csv
+import errno
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 import json
 import numpy as np
 import operator
 from abc import ABC, abstractmethod
 
+### numba compiles the convergence checks into a single fused loop when installed, numpy/pandas are kept as fallback
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 operator_map = {
     "<": operator.lt,
     ">": operator.gt,
@@ -34,6 +44,109 @@ operator_map = {
     "!=": operator.ne
 }
 
+### Patterns used on every restart/submission, compiled once at import
+_NUM_RE = re.compile(r'\b\d+\b')
+_INPUT_INDEX_RE = re.compile(r'input_file_index=(\d+)')
+_RESTART_LINE_RE = re.compile(r'^.*input_file_index=.*$', re.M)
+
+### Convergence kernel: CFL time step, divergence and kinetic energy checks over the recent csv rows in one pass each
+def _strided_rolling_mean(x, window, step):
+    ### equivalent to Series.rolling(window).mean()[::step].dropna(), kept as a running sum of the finite values
+    ### windows holding a nan or inf are dropped as in pandas, the sum is recomputed once the last of them leaves
+    n = x.shape[0]
+    out = np.empty((n - 1) // step + 1)
+    m = 0
+    acc = 0.0
+    nonfinite = 0
+    for i in range(n):
+        if np.isfinite(x[i]):
+            acc += x[i]
+        else:
+            nonfinite += 1
+        if i >= window:
+            if np.isfinite(x[i - window]):
+                acc -= x[i - window]
+            else:
+                nonfinite -= 1
+                if nonfinite == 0:
+                    acc = 0.0
+                    for j in range(i - window + 1, i + 1):
+                        acc += x[j]
+        if i >= window - 1 and i % step == 0 and nonfinite == 0:
+            out[m] = acc / window
+            m += 1
+    return out[:m]
+
+def _trailing_stable(ma, relchg_thres, grad_thres, allow_decrease):
+    ### trailing counts of stable relative changes and np.gradient(ma, 2) values
+    n = ma.shape[0]
+    stable_relchg = 0
+    for i in range(n - 2, -1, -1):
+        relchg = (ma[i + 1] - ma[i]) / ma[i]
+        if (allow_decrease and relchg < 0) or abs(relchg) < relchg_thres:
+            stable_relchg += 1
+        else:
+            break
+    stable_grad = 0
+    for i in range(n - 1, -1, -1):
+        if i == 0:
+            grad = (ma[1] - ma[0]) / 2.0
+        elif i == n - 1:
+            grad = (ma[n - 1] - ma[n - 2]) / 2.0
+        else:
+            grad = (ma[i + 1] - ma[i - 1]) / 4.0
+        if (allow_decrease and grad < 0) or abs(grad) < grad_thres:
+            stable_grad += 1
+        else:
+            break
+    return stable_relchg, stable_grad
+
+def _convergence_loops(dt_CFL, dt, div, ke, window, step, relchg_thres, grad_thres):
+    n = dt.shape[0]
+    bad_steps = 0
+    for i in range(n):
+        if dt_CFL[i] - dt[i] < 0:
+            bad_steps += 1
+    dt_check = bad_steps / n > 0.5
+
+    ### divergence only checked if the moving average reaches order 1e-1 (log10 of a negative value is nan in numpy)
+    moving_avg_div = _strided_rolling_mean(div, window, step)
+    div_check = False
+    highest = -np.inf
+    for val in moving_avg_div:
+        if np.isnan(val) or val < 0:
+            highest = np.nan
+            break
+        highest = max(highest, val)
+    if moving_avg_div.shape[0] > 1 and highest > 0.1:
+        stable_period_div = int((moving_avg_div.shape[0] - 1) * 0.8)
+        stable_relchg_div, stable_grad_div = _trailing_stable(moving_avg_div, relchg_thres, grad_thres, True)
+        div_check = stable_relchg_div < stable_period_div or stable_grad_div < stable_period_div
+
+    moving_avg_ke = _strided_rolling_mean(ke, window, step)
+    stable_period_ke = int((moving_avg_ke.shape[0] - 1) * 0.9)
+    stable_relchg_ke, stable_grad_ke = _trailing_stable(moving_avg_ke, relchg_thres, grad_thres, False)
+    ke_check = stable_relchg_ke < stable_period_ke or stable_grad_ke < stable_period_ke
+
+    return dt_check, div_check, ke_check
+
+if njit is not None:
+    ### numpy error model: divisions by zero give inf/nan as in the pandas version instead of raising
+    _strided_rolling_mean = njit(cache=True, error_model='numpy')(_strided_rolling_mean)
+    _trailing_stable = njit(cache=True, error_model='numpy')(_trailing_stable)
+    _convergence_kernel = njit(cache=True, error_model='numpy')(_convergence_loops)
+else:
+    _convergence_kernel = None
+
+### Communication with the local scheduler: JSON records delimited by the ASCII record separator
+RS = '\x1e'
+
+def record(**fields):
+    return RS + json.dumps(fields, default=str) + RS
+
+def marker(**fields):
+    print(record(**fields), flush=True)
+
 ################################################################################### PARENT CLASS ################################################################################
 
 ################################################################################# Author: Juan Pablo Valdes #########################################################################
@@ -45,6 +158,13 @@ operator_map = {
 
 class HPCScheduling(ABC):
 
+    ### Parsed run csv files, keyed by path and columns read. Lives only as long as one CLI call, so it saves reparsing
+    ### within a call; across monitor calls the persisted convergence state (_load_check_state) skips unchanged csvs
+    _csv_cache = {}
+
+    ### Convert script listing, {convert_path: (directory mtime, files)}, rescanned only when the directory changes
+    _convert_scripts_cache = {}
+
 ############################################################################ EXCEPTION CLASSES  #######################################################################################
 
     class JobStatError(Exception):
@@ -78,7 +198,7 @@ class HPCScheduling(ABC):
 
     ### assigning input parametric values as attributes of the SimScheduling class and submitting jobs
 
-    def run(self):
+    async def run(self):
 
         ### Creating f90
         print('-' * 100)
@@ -96,8 +216,7 @@ class HPCScheduling(ABC):
             self.setjobsh()
         except ValueError as e:
             print(f'Case ID {self.run_ID} failed due to: {e}')
-            print("====EXCEPTION====")
-            print("ValueError")
+            marker(exception="ValueError")
             raise ValueError (f'Exited HPC with error {e}')
 
         ### Submitting job.sh
@@ -107,36 +226,29 @@ class HPCScheduling(ABC):
 
         ### wait time to submit jobs, avoiding them to go all at once
         init_wait_time = np.random.RandomState().randint(60,180)
-        sleep(init_wait_time)
+        await asyncio.sleep(init_wait_time)
 
-        job_IDS = self.submit_job(self.path,self.run_name)
+        job_IDS = await self.submit_job(self.path,self.run_name)
 
         print('-' * 100)
         print(f'Job {self.run_ID} submitted succesfully with ID {job_IDS}')
 
-        sleep(120)
+        await self._wait_for_job_visible(job_IDS, timeout=120)
 
         ### Check job status and assign waiting time accordingly
         try:
-            t_jobwait, status, update_jobID = self.job_wait(job_IDS)
-            print("====JOB_IDS====")
-            print(update_jobID)
-            print("====JOB_STATUS====")
-            print(status)
-            print("====WAIT_TIME====")
-            print(t_jobwait)
+            t_jobwait, status, update_jobID = await self.job_wait(job_IDS)
+            marker(jobid=update_jobID, status=status, t_wait=t_jobwait)
 
         except HPCScheduling.JobStatError:
             print(f'Job {self.run_ID} failed on initial submission')
-            print("====EXCEPTION====")
-            print("JobStatError")
+            marker(exception="JobStatError")
         except ValueError:
-            print("====EXCEPTION====")
-            print("ValueError")
+            marker(exception="ValueError")
 
     ### checking jobstate and sleeping until completion or restart commands
 
-    def monitor(self):
+    async def monitor(self):
 
         ### Read dictionary with job_ID to monitor
         self.jobID = self.pset_dict['jobID']
@@ -145,14 +257,9 @@ class HPCScheduling(ABC):
 
         ### Call job waiting method and extract corresponding outputs
         try:
-            t_jobwait, status, newjobid = self.job_wait(
+            t_jobwait, status, newjobid = await self.job_wait(
                 int(self.jobID))
-            print("====JOB_IDS====")
-            print(newjobid)
-            print("====JOB_STATUS====")
-            print(status)
-            print("====WAIT_TIME====")
-            print(t_jobwait)
+            marker(jobid=newjobid, status=status, t_wait=t_jobwait)
 
             ### If job running, start convergence checks
             if status == 'R' and self.check:
@@ -161,13 +268,12 @@ class HPCScheduling(ABC):
                 ### Job likely to diverge, kill the job and raise the exception
                 if chk_status == 'D':
                     print('-' * 100)
-                    print("====EXCEPTION====")
-                    print("ConvergenceError")
+                    marker(exception="ConvergenceError")
                     print('-' * 100)
                     print(f'Job from run {self.run_ID} is failing to converge')
                     print(f'Killing Job ID {self.jobID} from run {self.run_ID}')
                     print('-' * 100)
-                    Popen(['qdel', f"{self.jobID}"])
+                    await self._pbs('qdel', f"{self.jobID}")
 
                 ### Convergence checks not needed at early stage in the run
                 elif chk_status == 'NR':
@@ -187,11 +293,9 @@ class HPCScheduling(ABC):
                     print('-' * 100)
 
         except HPCScheduling.JobStatError:
-            print("====EXCEPTION====")
-            print("JobStatError")
+            marker(exception="JobStatError")
         except ValueError as e:
-            print("====EXCEPTION====")
-            print("ValueError")
+            marker(exception="ValueError")
             print(f'Exited with message: {e}')
            
     ### creating f90 instance and executable
@@ -206,25 +310,19 @@ class HPCScheduling(ABC):
 
     ### Converting vtk to vtr
     @abstractmethod
-    def vtk_convert(self):
+    async def vtk_convert(self):
         pass
 
     ### checking job status and sending exceptions as fitting
 
-    def job_wait(self,job_id):
+    async def job_wait(self,job_id):
         try:
-            p = Popen(['qstat', '-a',f"{job_id}"],stdout=PIPE, stderr=PIPE)
-            output = p.communicate()[0]
-        
-            if p.returncode != 0:
-                raise subprocess.CalledProcessError(p.returncode, p.args)
-            
-            ## formatted to Imperial HPC, extracting job status and performing actions accordingly 
-            jobstatus = str(output,'utf-8').split()[-3:]
-            status = jobstatus[1]
+            ## formatted to Imperial HPC, extracting job status, walltime and elapsed time and performing actions accordingly 
+            status, wall_time, elap_time = await self._qstat_job(job_id)
 
-            if not jobstatus:
-                raise ValueError('Job exists but belongs to another account')
+            ### Finished jobs are kept by qstat -x with status F
+            if status == 'F':
+                raise HPCScheduling.JobStatError("qstat output empty, job finished or deleted from HPC run queue")
     
             if status == 'Q':
                 t_wait = 3600
@@ -232,23 +330,15 @@ class HPCScheduling(ABC):
             elif status == 'H':
                 print(f'Deleting HELD job with old id: {job_id}')
                 print('-' * 100)
-                Popen(['qdel', f"{job_id}"])
-                sleep(60)
-                newjobid = self.submit_job(self.path,self.run_name)
+                await self._pbs('qdel', f"{job_id}")
+                await asyncio.sleep(60)
+                newjobid = await self.submit_job(self.path,self.run_name)
                 t_wait = 1800
                 print(f'Submitted new job with id: {newjobid}')
             elif status == 'R':
-                time_format = '%H:%M'
-                time_format_regex = r'\d{2}:\d{2}'
-                
-                # can have early monitor where R and -- as elap time
-                if re.match(time_format_regex, jobstatus[2]):
-                    if jobstatus[0] == '24:00':
-                        jobstatus[0] = '23:00'
-                    wall_time = datetime.datetime.strptime(jobstatus[0], time_format).time()
-                    elap_time = datetime.datetime.strptime(jobstatus[2], time_format).time()
-                    delta = datetime.datetime.combine(datetime.date.min, wall_time)-datetime.datetime.combine(datetime.date.min, elap_time)
-                    remaining = delta.total_seconds()+60
+                # can have early monitor where R and no elapsed time yet
+                if wall_time and elap_time:
+                    remaining = self._hms_seconds(wall_time) - self._hms_seconds(elap_time) + 60
                     t_wait = remaining
                     newjobid = job_id
                 else:
@@ -257,32 +347,90 @@ class HPCScheduling(ABC):
                     print(f'Elap time has not shown yet. Re-check in {t_wait/60} mins.')
             else:
                 t_wait = 0
-                
-        except subprocess.CalledProcessError:
-            raise HPCScheduling.JobStatError("qstat output empty, job finished or deleted from HPC run queue")
+                newjobid = job_id
         
         except ValueError as e:
             print(f"Error: {e}")
-            raise ValueError('Existing job but doesnt belong to this account')
+            raise ValueError('qstat output for this job could not be read')
             
         return t_wait, status, newjobid
 
+    ### Waiting for a just submitted job to show up in qstat, polling with a backoff of 2 s doubling up to 60 s
+    ### instead of a fixed sleep; gives up after timeout seconds, the longest the fixed sleep used to wait
+    async def _wait_for_job_visible(self,job_id,timeout=120):
+        waited = 0
+        delay = 2
+
+        while waited < timeout:
+            delay = min(delay, timeout - waited)
+            await asyncio.sleep(delay)
+            waited += delay
+            if (await self._qstat_job(job_id))[0] != 'F':
+                return True
+            delay = min(60, delay * 2)
+
+        return False
+
+    ### qstat -x -f for one job, parsed into (status, walltime, elapsed); -x keeps finished jobs with status F
+    ### and a job qstat does not report at all is taken as finished too
+
+    @classmethod
+    async def _qstat_job(cls,job_id):
+        _, output = await cls._pbs('qstat', '-x', '-f', '-F', 'json', str(job_id))
+
+        ### an unknown id only prints to stderr, so the exit code is not checked
+        jobs = json.loads(output or b'{}').get('Jobs', {})
+
+        for full_id, info in jobs.items():
+            if full_id.split('.')[0] == str(job_id):
+                return (info.get('job_state'),
+                        info.get('Resource_List', {}).get('walltime'),
+                        info.get('resources_used', {}).get('walltime'))
+
+        return 'F', None, None
+
+    ### Converting a PBS HH:MM:SS duration to seconds
+    @staticmethod
+    def _hms_seconds(duration):
+        seconds = 0
+        for field in duration.split(':'):
+            seconds = seconds * 60 + int(field)
+        return seconds
+
+    ### Running PBS commands (qsub, qstat, qdel) as asyncio subprocesses, returns the exit code and stdout
+    ### check raises CalledProcessError on a non-zero exit code, as subprocess.run(check=True) does
+    @staticmethod
+    async def _pbs(*args, cwd=None, check=False):
+        proc = await asyncio.create_subprocess_exec(*args, stdout=PIPE, stderr=PIPE, cwd=cwd)
+        output, error = await proc.communicate()
+        if check and proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, args, output, error)
+        return proc.returncode, output
+
     ### checking if the running job is diverging or not
     ### Author: Fuyue Liang
 
     def check_convergence(self):
 
-        ### Jumping to ephemeral to read csv and begin checks
-        ephemeral_path = os.path.join(os.environ['EPHEMERAL'],self.run_name)
-        os.chdir(ephemeral_path)
+        ### Reading the csv from ephemeral to begin checks
         chk_status = None
 
         ### Checking if the csv exists
-        if not os.path.exists(f'{self.run_name}.csv' if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv'):
+        csv_path = self._csv_path()
+        if not os.path.exists(csv_path):
             chk_status = 'FNF'
             return chk_status
         
-        csv_to_check = pd.read_csv(f'{self.run_name}.csv' if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv')
+        ### Skip the checks if the csv has not been written to since the previous monitor call
+        csv_stat = os.stat(csv_path)
+        csv_sig = [csv_stat.st_mtime_ns, csv_stat.st_size]
+        last_check = self._load_check_state()
+        if last_check.get('csv') == csv_sig and last_check.get('status'):
+            chk_status = last_check['status']
+            print(f'csv unchanged since the last convergence check, keeping status {chk_status}')
+            return chk_status
+
+        csv_to_check = self._read_run_csv(csv_path, usecols=['dt CFL','dt','Max(div(V))','Kinetic Energy'])
         
         # verify whether convergence checks can start
         len_to_check = 400
@@ -297,6 +445,7 @@ class HPCScheduling(ABC):
         if len(csv_to_check) < len_to_check:
             # let the job run for longer, return NotReady NR status
             chk_status = 'NR'
+            self._save_check_state(csv_sig, chk_status)
             return chk_status
         
         else:
@@ -305,66 +454,16 @@ class HPCScheduling(ABC):
             lower_limit = csv_to_check['dt CFL'].nlargest(5).iloc[-1] * 1e-3
             CFL_check = np.any(csv_to_check['dt CFL'] < lower_limit)
 
-            dt_CFL, dt = recent_data['dt CFL'].values, recent_data['dt'].values
-            dt_arr = dt_CFL - dt
-            bad_steps = 0
-            for item in dt_arr:
-                if item < 0:
-                    bad_steps += 1
-            bad_steps_percent = bad_steps / recent
-
-            dt_check = bad_steps_percent > 0.5
+            ### dt, divergence and KE checks on the recent rows, compiled kernel if numba is available
+            checks_func = _convergence_kernel if _convergence_kernel is not None else self._convergence_numpy
+            dt_check, div_check, ke_check = checks_func(
+                np.ascontiguousarray(recent_data['dt CFL'].values, dtype=np.float64),
+                np.ascontiguousarray(recent_data['dt'].values, dtype=np.float64),
+                np.ascontiguousarray(recent_data['Max(div(V))'].values, dtype=np.float64),
+                np.ascontiguousarray(recent_data['Kinetic Energy'].values, dtype=np.float64),
+                window_size, window_step, relchg_thres, grad_thres)
             ts_check = CFL_check or dt_check
 
-            ### Divergence ###
-            moving_avg_div = recent_data['Max(div(V))'].rolling(window=window_size).mean()[::window_step].dropna().values
-            highest_order = np.log10(moving_avg_div).max()
-            div_check = False
-
-            if highest_order > -1:
-                relchg_div = np.diff(moving_avg_div) / moving_avg_div[:-1]
-                grad_div = np.gradient(moving_avg_div, 2)
-
-                stable_period_div = int(len(relchg_div) * 0.8)
-                stable_relchg_div = 0
-                stable_grad_div = 0
-
-                for rate in relchg_div:
-                    if rate < 0 or abs(rate) < relchg_thres:
-                        stable_relchg_div += 1
-                    else:
-                        stable_relchg_div = 0
-                for rate in grad_div:
-                    if rate < 0 or abs(rate) < grad_thres:
-                        stable_grad_div += 1
-                    else:
-                        stable_grad_div = 0
-                
-                div_check = stable_relchg_div < stable_period_div or stable_grad_div < stable_period_div
-            
-            ### Kinetic Energy ###
-            # check the KE: there is no relative change higher than the initial ones
-            moving_avg_ke = recent_data['Kinetic Energy'].rolling(window=window_size).mean()[::window_step].dropna().values
-            relchg_ke = np.diff(moving_avg_ke) / moving_avg_ke[:-1]
-            grad_ke = np.gradient(moving_avg_ke,2)
-
-            stable_period_ke = int(len(relchg_ke) * 0.9)
-            stable_relchg_ke = 0
-            stable_grad_ke = 0
-
-            for rate in relchg_ke:
-                if abs(rate) < relchg_thres:
-                    stable_relchg_ke += 1
-                else:
-                    stable_relchg_ke = 0
-            for rate in grad_ke:
-                if abs(rate) < grad_thres:
-                    stable_grad_ke += 1
-                else:
-                    stable_grad_ke = 0
-
-            ke_check = stable_relchg_ke < stable_period_ke or stable_grad_ke < stable_period_ke
-
             # check all the conditions
             checks = {
                 'time step check':ts_check,
@@ -391,8 +490,116 @@ class HPCScheduling(ABC):
                 chk_status = 'C'
                 print('All checks have passed successfully')
                 
+            self._save_check_state(csv_sig, chk_status)
             return chk_status
 
+    ### numpy/pandas version of the convergence kernel, used when numba is not installed
+    @staticmethod
+    def _convergence_numpy(dt_CFL, dt, div, ke, window_size, window_step, relchg_thres, grad_thres):
+
+        dt_arr = dt_CFL - dt
+        bad_steps = np.count_nonzero(dt_arr < 0)
+        dt_check = bad_steps / len(dt_arr) > 0.5
+
+        ### Divergence ###
+        moving_avg_div = pd.Series(div).rolling(window=window_size).mean()[::window_step].dropna().values
+        highest_order = np.log10(moving_avg_div).max()
+        div_check = False
+
+        if highest_order > -1:
+            relchg_div = np.diff(moving_avg_div) / moving_avg_div[:-1]
+            grad_div = np.gradient(moving_avg_div, 2)
+
+            stable_period_div = int(len(relchg_div) * 0.8)
+            # trailing number of consecutive decreasing or stable rates
+            stable_relchg_div = HPCScheduling._trailing_run((relchg_div < 0) | (np.abs(relchg_div) < relchg_thres))
+            stable_grad_div = HPCScheduling._trailing_run((grad_div < 0) | (np.abs(grad_div) < grad_thres))
+            
+            div_check = stable_relchg_div < stable_period_div or stable_grad_div < stable_period_div
+        
+        ### Kinetic Energy ###
+        # check the KE: there is no relative change higher than the initial ones
+        moving_avg_ke = pd.Series(ke).rolling(window=window_size).mean()[::window_step].dropna().values
+        relchg_ke = np.diff(moving_avg_ke) / moving_avg_ke[:-1]
+        grad_ke = np.gradient(moving_avg_ke,2)
+
+        stable_period_ke = int(len(relchg_ke) * 0.9)
+        # trailing number of consecutive stable rates
+        stable_relchg_ke = HPCScheduling._trailing_run(np.abs(relchg_ke) < relchg_thres)
+        stable_grad_ke = HPCScheduling._trailing_run(np.abs(grad_ke) < grad_thres)
+
+        ke_check = stable_relchg_ke < stable_period_ke or stable_grad_ke < stable_period_ke
+
+        return dt_check, div_check, ke_check
+
+    ### csv signature (mtime_ns, size) and status of the last convergence check, kept in ephemeral across monitor calls
+    def _check_state_path(self):
+        return os.path.join(self.ephemeral_path, f'.{self.run_name}_convcheck.json')
+
+    def _load_check_state(self):
+        try:
+            with open(self._check_state_path(), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_check_state(self, csv_sig, chk_status):
+        state_path = self._check_state_path()
+        with open(state_path + '.tmp', 'w') as f:
+            json.dump({'csv': csv_sig, 'status': chk_status}, f)
+        os.replace(state_path + '.tmp', state_path)
+
+    ### Run csv in ephemeral, named either {run_name}.csv or HST_{run_name}.csv
+    def _csv_path(self):
+        csv_path = os.path.join(self.ephemeral_path, f'{self.run_name}.csv')
+        return csv_path if os.path.exists(csv_path) else os.path.join(self.ephemeral_path, f'HST_{self.run_name}.csv')
+
+    ### Reading the run csv, reusing the parsed DataFrame until the file's modification time or size change (per process)
+    def _read_run_csv(self,csv_path,usecols=None):
+        csv_stat = os.stat(csv_path)
+        key = (csv_path, tuple(usecols) if usecols else None)
+        cached = HPCScheduling._csv_cache.get(key)
+
+        if cached is None or cached[:2] != (csv_stat.st_mtime, csv_stat.st_size):
+            cached = (csv_stat.st_mtime, csv_stat.st_size, pd.read_csv(csv_path, usecols=usecols, engine='c'))
+            HPCScheduling._csv_cache[key] = cached
+
+        return cached[2]
+
+    ### First and last value of one csv column, read from the header, first row and file tail only
+    def _csv_first_last(self,csv_path,column,block=65536):
+
+        with open(csv_path,'rb') as f:
+            header = f.readline()
+            first = f.readline()
+            f.seek(0,2)
+            size = f.tell()
+            f.seek(max(0,size-block))
+            tail = f.read().rstrip(b'\r\n')
+
+        columns = next(csv.reader([header.decode(errors='replace').rstrip('\r\n')]))
+        if column not in columns:
+            raise KeyError('Stop condition parameter defined does not exist in the csv file')
+        idx = columns.index(column)
+
+        ### Fall back to pandas if the tail block holds no complete line or a row does not parse
+        if b'\n' in tail and first.strip():
+            last = tail.rsplit(b'\n',1)[1]
+            try:
+                rows = list(csv.reader([first.decode(), last.decode()]))
+                return float(rows[0][idx]), float(rows[1][idx])
+            except (ValueError, IndexError, UnicodeDecodeError):
+                pass
+
+        cond_col = self._read_run_csv(csv_path, usecols=[column])[column]
+        return cond_col.iloc[0], cond_col.iloc[-1]
+
+    ### Length of the trailing run of True values in a boolean array
+    @staticmethod
+    def _trailing_run(mask):
+        unstable = np.flatnonzero(~mask)
+        return len(mask) - (unstable[-1] + 1) if unstable.size else len(mask)
+
     ### Function that performs multiple checks to decide if the simulation should restart
     ### Author: Paula Pico
 
@@ -402,43 +609,35 @@ class HPCScheduling(ABC):
     
         # Check # 1: Does the .out file exist? If not raise exception and kill workflow --------------------------------------------------------------
         if not os.path.exists(self.output_file_path):
-            message = ['-' * 100,"====EXCEPTION====","FileNotFoundError",f'File {self.run_name}.out does not exist','-' * 100]
+            message = ['-' * 100,record(exception="FileNotFoundError"),f'File {self.run_name}.out does not exist','-' * 100]
             return False, new_restart_num, message
 
+        ### Last 50 lines of the .out, read once and shared by checks 2 and 4
+        out_tail = self._tail_lines(self.output_file_path, 50)
+
         # Check # 2: Did the simulation diverge or were the .rst files deleted? If so, raise exception and kill workflow -----------------------------
-        os.chdir(self.path)
         line_with_pattern = None
         
         ### Checking last restart file instance in output file
-        with open(f"{self.run_name}.out", 'r') as file:
-            pattern = 'BAD TERMINATION OF ONE OF YOUR APPLICATION PROCESSES'
-            # Only read the last 50 lines of .out file
-            lines = file.readlines()[-50:]
-            for line in reversed(lines):
-                if pattern in line:
-                    line_with_pattern = line.strip()
-                    break
-            if line_with_pattern is not None:
-                message = ['-' * 100,"====EXCEPTION====","BadTerminationError",f'Simulation {self.run_name} diverged or .rst files deleted!','-' * 100]
-                return False, new_restart_num, message
+        pattern = 'BAD TERMINATION OF ONE OF YOUR APPLICATION PROCESSES'
+        for line in reversed(out_tail):
+            if pattern in line:
+                line_with_pattern = line.strip()
+                break
+        if line_with_pattern is not None:
+            message = ['-' * 100,record(exception="BadTerminationError"),f'Simulation {self.run_name} diverged or .rst files deleted!','-' * 100]
+            return False, new_restart_num, message
         
         # Check # 3: Has the finishing condition been satisfied? If so, raise exception and kill workflow  -----------------------------------------------
-        os.chdir(self.ephemeral_path)
-
-        if os.path.exists(os.path.join(".", f'{self.run_name}.csv' if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv')):
-            csv_file = pd.read_csv(f'{self.run_name}.csv' if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv')
-
-            ### Check if the key supplied as cond_csv acutally exists in the csv file before carrying on
-            if self.cond_csv not in csv_file.columns:
-                raise KeyError('Stop condition parameter defined does not exist in the csv file')
-            
-            cond_val_last = csv_file.iloc[:,csv_file.columns.get_loc(self.cond_csv)].iloc[-1]
-            cond_val_ini = csv_file.iloc[:,csv_file.columns.get_loc(self.cond_csv)].iloc[0]
+        csv_path = self._csv_path()
+        if os.path.exists(csv_path):
+            ### Raises KeyError if the key supplied as cond_csv does not exist in the csv file
+            cond_val_ini, cond_val_last = self._csv_first_last(csv_path, self.cond_csv)
             progress = 100*np.abs(((cond_val_last - cond_val_ini)/(float(self.cond_csv_limit) - cond_val_ini)))
             comparison_func = operator_map[self.conditional]
 
             if not comparison_func(cond_val_last, float(self.cond_csv_limit)):
-                message = ['-' * 100,f"Simulation {self.run_name} reached completion, no restarts required","====RETURN_BOOL====","False",'-' * 100]
+                message = ['-' * 100,f"Simulation {self.run_name} reached completion, no restarts required",record(ret_bool="False"),'-' * 100]
                 return False, new_restart_num, message
         else:
             print('-' * 100)
@@ -454,66 +653,49 @@ class HPCScheduling(ABC):
             )
 
         # Check # 4: Did the HPC kill the job due to lack of memory? If so, issue warning and continue -------------------------------------------------------
-        os.chdir(self.path)
         line_with_pattern = None
         
         ### Checking last restart file instance in output file
-        with open(f"{self.run_name}.out", 'r') as file:
-            pattern = 'PBS: job killed: mem'
-            # Only read the last 50 lines of .out file
-            lines = file.readlines()[-50:]
-            for line in reversed(lines):
-                if pattern in line:
-                    line_with_pattern = line.strip()
-                    break
-            if line_with_pattern is not None:
+        pattern = 'PBS: job killed: mem'
+        for line in reversed(out_tail):
+            if pattern in line:
+                line_with_pattern = line.strip()
+                break
+        if line_with_pattern is not None:
+            message.append(
+                f"{'-' * 100}\n"
+                f"WARNING: \n"
+                f"Simulation {self.run_name} was killed due to lack of memory.\n"
+                f"Job will be re-submitted but please check.\n"
+                f"{'-' * 100}\n"
+            )
+        
+        # Check # 5: Has it created .rst files? If not raise exception and kill workflow. Are they new files? If not, issue warning and continue -------------------
+        
+        ### Checking last restart file instance in output file, reading only the tail of the .out
+        line_with_pattern = self._last_line_with(self.output_file_path, 'writing restart file')
+        ### Extracting restart number from line
+        if line_with_pattern is None:
+            message = ['-' * 100,record(exception="ValueError"),f'Restart file pattern in .out not found for simulation {self.run_name}','-' * 100]
+            return False, new_restart_num, message       
+        else:
+            ### searching with re a sequence of 1 or more digits '\d+' in between two word boundaries '\b'
+            match = _NUM_RE.search(line_with_pattern)
+            if match is None:
+               message = ['-' * 100,record(exception="ValueError"),f'No restart number match found in simulation {self.run_name}','-' * 100]
+               return False, new_restart_num, message
+            else:
+                new_restart_num = int(match.group())
+            with open(os.path.join(self.path, f"job_{self.run_name}.sh"), 'r') as file:
+                old_restart_num = int(_INPUT_INDEX_RE.findall(file.read())[-1])
+            if new_restart_num == old_restart_num:
                 message.append(
                     f"{'-' * 100}\n"
                     f"WARNING: \n"
-                    f"Simulation {self.run_name} was killed due to lack of memory.\n"
+                    f"No new .rst files were created in the previous run.\n"
                     f"Job will be re-submitted but please check.\n"
                     f"{'-' * 100}\n"
                 )
-        
-        # Check # 5: Has it created .rst files? If not raise exception and kill workflow. Are they new files? If not, issue warning and continue -------------------
-        os.chdir(self.path)
-        line_with_pattern = None
-        
-        ### Checking last restart file instance in output file
-        with open(f"{self.run_name}.out", 'r') as file:
-            pattern = 'writing restart file'
-            lines = file.readlines()
-            for line in reversed(lines):
-                if pattern in line:
-                    line_with_pattern = line.strip()
-                    break
-            ### Extracting restart number from line
-            if line_with_pattern is None:
-                message = ['-' * 100,"====EXCEPTION====","ValueError",f'Restart file pattern in .out not found for simulation {self.run_name}','-' * 100]
-                return False, new_restart_num, message       
-            else:
-                ### searching with re a sequence of 1 or more digits '\d+' in between two word boundaries '\b'
-                match = re.search(r"\b\d+\b", line_with_pattern)
-                if match is None:
-                   message = ['-' * 100,"====EXCEPTION====","ValueError",f'No restart number match found in simulation {self.run_name}','-' * 100]
-                   return False, new_restart_num, message
-                else:
-                    new_restart_num = int(match.group())
-                with open(f"job_{self.run_name}.sh", 'r+') as file:
-                    lines = file.readlines()
-                    for line in reversed(lines):
-                        match = re.search(r'input_file_index=(\d+)', line)
-                        if match:
-                            old_restart_num = int(match.group(1))
-                            break
-                if new_restart_num == old_restart_num:
-                    message.append(
-                        f"{'-' * 100}\n"
-                        f"WARNING: \n"
-                        f"No new .rst files were created in the previous run.\n"
-                        f"Job will be re-submitted but please check.\n"
-                        f"{'-' * 100}\n"
-                    )
 
         message.append(
             f"{'-' * 100}\n"
@@ -526,43 +708,70 @@ class HPCScheduling(ABC):
         # If all checks have been passed, then return True to restart the job
         return True, new_restart_num, message
 
+    ### last line of a text file containing pattern, found with rfind over a read-only memory map of the file
+    @staticmethod
+    def _last_line_with(path,pattern):
+
+        pattern = pattern.encode()
+        with open(path,'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                idx = mm.rfind(pattern)
+                if idx == -1:
+                    return None
+                start = mm.rfind(b'\n', 0, idx) + 1
+                end = mm.find(b'\n', idx)
+                return mm[start:end if end != -1 else len(mm)].decode(errors='replace').strip()
+
+    ### last n lines of a text file, located by walking newlines back from the end of a memory map
+    @staticmethod
+    def _tail_lines(path,n):
+
+        with open(path,'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = len(mm) - 1 if mm[-1:] == b'\n' else len(mm)
+                for _ in range(n):
+                    pos = mm.rfind(b'\n', 0, pos)
+                    if pos == -1:
+                        break
+                return mm[pos + 1:].decode(errors='replace').splitlines()
+
     ### Restarting sh based on termination condition eval and last output restart reached
     ### Authors: Juan Pablo Valdes, Paula Pico
     
-    def job_restart(self):
+    async def job_restart(self):
 
         # Calling the checking function to see if the simulation can restart, verifying cond_csv key exists condition in csv file
         try:
             ret_bool, new_restart_num, message = self.condition_restart()
         except KeyError as e:
             print(f'Exited with message: {e}')
-            print("====EXCEPTION====")
-            print("KeyError")
+            marker(exception="KeyError")
             return False
 
         # If the output of the cheking function is True, being the restarting process
         if ret_bool:
             for line in message:
                 print(line)
-            os.chdir(self.path)
-            ### Modifying .sh file accordingly
-            with open(f"job_{self.run_name}.sh", 'r+') as file:
-                lines = file.readlines()
-                for line in lines:
-                    if "input_file_index=" in line:
-                        restart_line = line
-                        break
-                modified_restart = re.sub('FALSE', 'TRUE', restart_line)
+            ### Modifying .sh file accordingly, only the first line holding input_file_index is edited
+            with open(os.path.join(self.path, f"job_{self.run_name}.sh"), 'r+') as file:
+                text = file.read()
+
+                ### set the restart flags to TRUE and the restart number to the latest .rst written
+                def restart_line(match):
+                    line = match.group().replace('FALSE', 'TRUE')
+                    return _INPUT_INDEX_RE.sub(f'input_file_index={new_restart_num}', line)
 
-                ### modifying the restart number by searching dynamically with f-strings. 
-                modified_restart = re.sub(r'{}=\d+'.format('input_file_index'), '{}={}'.format('input_file_index', new_restart_num), modified_restart)
-                lines[lines.index(restart_line)] = modified_restart
+                text = _RESTART_LINE_RE.sub(restart_line, text, count=1)
                 file.seek(0)
-                file.writelines(lines)
+                file.write(text)
                 file.truncate()
 
             ### submitting job with restart modification
-            job_IDS = self.submit_job(self.path,self.run_name)
+            job_IDS = await self.submit_job(self.path,self.run_name)
             print('-' * 100)
             print(f'Job {self.run_name} re-submitted correctly with ID: {job_IDS}')
 
@@ -570,27 +779,18 @@ class HPCScheduling(ABC):
             # args1: cleanrst = True (default) or False
             # args2: saverstnum = int (default: 1, as in only the lastest one would be saved.)
             self.rst_cleaning()
-            sleep(120)
+            await self._wait_for_job_visible(job_IDS, timeout=120)
 
             ### check status and waiting time for re-submitted job
             try:
-                t_jobwait, status, new_jobID = self.job_wait(job_IDS)
-                print("====JOB_IDS====")
-                print(new_jobID)
-                print("====JOB_STATUS====")
-                print(status)
-                print("====WAIT_TIME====")
-                print(t_jobwait)
-                print("====RETURN_BOOL====")
-                print("True")
+                t_jobwait, status, new_jobID = await self.job_wait(job_IDS)
+                marker(jobid=new_jobID, status=status, t_wait=t_jobwait, ret_bool="True")
                 return True
             except HPCScheduling.JobStatError:
                 print(f'Restart job {self.run_ID} failed on initial re-submission')
-                print("====EXCEPTION====")
-                print("JobStatError")
+                marker(exception="JobStatError")
             except ValueError:
-                print("====EXCEPTION====")
-                print("ValueError")
+                marker(exception="ValueError")
             
         else:
             print('-' * 100)
@@ -598,42 +798,259 @@ class HPCScheduling(ABC):
                 print(line)
             return False
 
-    ### submitting the SMX job and recording job_id
+    ### classify ISO/VAR vtks and VAR pvds from a single directory listing
     @staticmethod
-    def submit_job(path,name):
+    def scan_vtks(path='.'):
+
+        ISO_file_list = []
+        VAR_steps = {}
+        PVD_file_list = []
+        last_vtk = None
+
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith('.vtk'):
+                    if name.startswith('ISO_'):
+                        ISO_file_list.append(name)
+                    elif name.startswith('VAR_') and '_' in name[4:]:
+                        ### VAR_{run}_{step}.vtk, keyed by the integer step
+                        try:
+                            step = int(name.rsplit('_',1)[1][:-4])
+                        except ValueError:
+                            continue
+                        VAR_steps.setdefault(step, []).append(name)
+                        if last_vtk is None or step > last_vtk:
+                            last_vtk = step
+                elif name.endswith('.pvd') and name.startswith('VAR_') and '_time=' in name[4:]:
+                    PVD_file_list.append(name)
+
+        return ISO_file_list, VAR_steps, PVD_file_list, last_vtk
+
+    ### move into dst_dir with a single os.replace, copying and unlinking only across filesystems
+    @staticmethod
+    def fast_move(file,dst_dir):
 
-        proc = []
-        os.chdir(f'{path}')
-        proc = Popen(['qsub', f"job_{name}.sh"], stdout=PIPE)
+        dst = os.path.join(dst_dir, os.path.basename(file))
+        try:
+            os.replace(file, dst)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.copy2(file, dst)
+            os.unlink(file)
+
+    ### move the named files from src_dir into dst_dir, renaming relative to one open fd per directory (renameat)
+    ### names crossing filesystems fall back to fast_move
+    @classmethod
+    def move_names(cls,names,src_dir,dst_dir):
+
+        src_fd = os.open(src_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            dst_fd = os.open(dst_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                for name in names:
+                    try:
+                        os.replace(name, name, src_dir_fd=src_fd, dst_dir_fd=dst_fd)
+                    except OSError as e:
+                        if e.errno != errno.EXDEV:
+                            raise
+                        cls.fast_move(os.path.join(src_dir, name), dst_dir)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+
+    ### move a batch of independent files concurrently, first error is re-raised
+    @classmethod
+    def move_files(cls,files,dst_dir,max_workers=16):
+
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            list(ex.map(lambda file: cls.fast_move(file, dst_dir), files))
+
+    ### copy the base case into the run folder: copy-on-write clones where the filesystem supports them,
+    ### otherwise hardlinks for the files never edited per run and real copies for the templated ones
+    @staticmethod
+    def copy_base_case(src,dst,templated):
 
-        output = proc.communicate()[0].decode('utf-8').split()
+        try:
+            subprocess.run(['cp', '-r', '--reflink=always', f'{src}/.', dst], capture_output=True, check=True)
+            return
+        except (OSError, subprocess.CalledProcessError):
+            pass
+
+        def link_or_copy(src_file,dst_file):
+            if os.path.basename(src_file) not in templated:
+                try:
+                    os.link(src_file, dst_file)
+                    return dst_file
+                except OSError:
+                    pass
+            return shutil.copy2(src_file, dst_file)
+
+        shutil.copytree(src, dst, copy_function=link_or_copy, dirs_exist_ok=True)
+
+    ### copy the convert scripts into dst_dir (open as dst_fd) from a single directory listing, the kernel copies the bytes (sendfile)
+    ### a prebuilt convert_scripts.tar in convert_path is extracted with one tar call instead, falling back to the per-file copy
+    ### files are independent, so the copies are overlapped in a thread pool; the first failure is re-raised
+    def copy_convert_scripts(self,dst_dir,dst_fd,max_workers=8):
+
+        mtime = os.stat(self.convert_path).st_mtime_ns
+        cached = HPCScheduling._convert_scripts_cache.get(self.convert_path)
+        if cached is not None and cached[0] == mtime:
+            sources = cached[1]
+        else:
+            with os.scandir(self.convert_path) as entries:
+                sources = [entry.path for entry in entries if not entry.name.startswith('.') and entry.is_file()]
+            HPCScheduling._convert_scripts_cache[self.convert_path] = (mtime, sources)
+
+        tarball = os.path.join(self.convert_path, 'convert_scripts.tar')
+        if tarball in sources:
+            try:
+                subprocess.run(['tar', '-xf', tarball], capture_output=True, check=True, cwd=dst_dir)
+                return
+            except (OSError, subprocess.CalledProcessError):
+                sources = [src for src in sources if src != tarball]
+
+        def copy_script(src):
+            with open(src, 'rb') as fsrc:
+                src_st = os.fstat(fsrc.fileno())
+                fd = os.open(os.path.basename(src), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600, dir_fd=dst_fd)
+                try:
+                    offset = 0
+                    while offset < src_st.st_size:
+                        sent = os.sendfile(fd, fsrc.fileno(), offset, src_st.st_size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                    ### keep the executable bits of the job and python scripts
+                    os.fchmod(fd, src_st.st_mode & 0o7777)
+                finally:
+                    os.close(fd)
 
-        ### Search job id from output after qsub
-        jobid = int(re.search(r'\b\d+\b',output[0]).group())
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            list(ex.map(copy_script, sources))
+
+    ### delete the restart files in path (same match as rm *rst), unlinking by name relative to one open directory fd
+    @staticmethod
+    def remove_rst(path):
+
+        dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            with os.scandir(dir_fd) as entries:
+                for entry in entries:
+                    if entry.name.endswith('rst') and not entry.name.startswith('.') and entry.is_file():
+                        os.unlink(entry.name, dir_fd=dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    ### render placeholders in a template file with a single read and write
+    @staticmethod
+    def fill_placeholders(path,subs):
+
+        with open(path,'r') as f:
+            text = f.read()
+
+        for key, value in subs.items():
+            text = text.replace(key,str(value))
+
+        with open(path,'w') as f:
+            f.write(text)
+
+    ### submitting the SMX job and recording job_id
+    ### Every HPC call submits a single job (run, restart, held re-submission or convert), so there is nothing to group
+    ### into a qsub -J array; qsub is awaited as a subprocess so it does not block the event loop
+    @staticmethod
+    async def submit_job(path,name):
+
+        _, output = await HPCScheduling._pbs('qsub', f"job_{name}.sh", cwd=path, check=True)
+        ### only the first line of the qsub output is needed (12345.pbs)
+        first = output.partition(b'\n')[0].decode('utf-8').strip()
+
+        ### Job id from qsub output, regex search only if the prefix is not a plain number
+        head = first.partition('.')[0]
+        jobid = int(head) if head.isdigit() else int(_NUM_RE.search(first).group())
 
         return jobid
 
     ### clean previous rst file from ephemeral
     def rst_cleaning(self,cleanrst=True, saverstnum=1):
-        os.chdir(self.ephemeral_path)
         saverstnum = int(saverstnum)
 
-        if cleanrst:
-            rstfiles = glob.glob('*rst')
-            last_rst = max(int(filename.split('_')[-1].split('.')[1]) for filename in rstfiles)
-            for rst in rstfiles:
-                rstnum = int(rst.split('_')[-1].split('.')[1])
-                if rstnum <= int(last_rst-saverstnum):
-                    file_path = os.path.join(self.ephemeral_path, rst)
-                    os.remove(file_path)
-        cleaned_rst = glob.glob('*rst')
-        rstlist = sorted([int(filename.split('_')[-1].split('.')[1]) for filename in cleaned_rst])
+        ### single listing of ephemeral, old restarts unlinked by name relative to the open directory fd
+        dir_fd = os.open(self.ephemeral_path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            rstnums = {name: int(name.split('_')[-1].split('.')[1]) for name in os.listdir(dir_fd)
+                       if name.endswith('rst') and not name.startswith('.')}
+            if cleanrst:
+                last_rst = max(rstnums.values())
+                for rst, rstnum in list(rstnums.items()):
+                    if rstnum <= int(last_rst-saverstnum):
+                        os.unlink(rst, dir_fd=dir_fd)
+                        del rstnums[rst]
+        finally:
+            os.close(dir_fd)
+        rstlist = sorted(rstnums.values())
         rstcount = int(rstlist[-1]-rstlist[0]+1)
 
         print(f'Restart file are saved from time step {rstlist[0]} to {rstlist[-1]}.')
         print(f'{rstcount} sets of Restart files are saved')
 
 
+### Domain decomposition for the static mixer job.sh: (xsub, ysub, zsub, ncpus, n_nodes, mem, cell1, cell2, cell3)
+### 64 cells per subdomain with ceil(yz_cpus_l) yz-subdomains, x-subdomains following the (n_ele+1) diameters of length
+def _decomp_low(n_ele, yz_cpus_l, yz_cpus_h):
+    ysub = zsub = math.ceil(yz_cpus_l)
+    xsub = int(ysub*(n_ele+1))
+    return xsub, ysub, zsub, int(xsub*ysub*zsub), 1, 200, 64, 64, 64
+
+### 128 cells per subdomain with ceil(yz_cpus_h) yz-subdomains on a single node
+def _decomp_high(n_ele, yz_cpus_l, yz_cpus_h):
+    ysub = zsub = math.ceil(yz_cpus_h)
+    xsub = int(ysub*(n_ele+1))
+    return xsub, ysub, zsub, int(xsub*ysub*zsub), 1, 768, 128, 128, 128
+
+### 4x4 yz-subdomains with 64 cells, split over n_nodes in the capability queue
+def _decomp_nodes(n_nodes):
+    def layout(n_ele, yz_cpus_l, yz_cpus_h):
+        ysub = zsub = 4
+        xsub = int(ysub*(n_ele+1))
+        return xsub, ysub, zsub, int(xsub*ysub*zsub/n_nodes), n_nodes, 256, 64, 64, 64
+    return layout
+
+### Two phase case with only one element: designed to operate with only one node in the short queue
+def _decomp_single_64(n_ele, yz_cpus_l, yz_cpus_h):
+    xsub = math.ceil(yz_cpus_l)*2
+    ysub = zsub = int(xsub/2)
+    return xsub, ysub, zsub, int(xsub*ysub*zsub), 1, 200, 64, 64, 64
+
+def _decomp_single_mixed(n_ele, yz_cpus_l, yz_cpus_h):
+    xsub = math.ceil(yz_cpus_l)
+    ysub = zsub = int(xsub)
+    return xsub, ysub, zsub, int(xsub*ysub*zsub), 1, 300, 128, 64, 64
+
+def _decomp_single_128(n_ele, yz_cpus_l, yz_cpus_h):
+    xsub = math.ceil(yz_cpus_h)
+    ysub = zsub = int(xsub)
+    return xsub, ysub, zsub, int(xsub*ysub*zsub), 1, 768, 128, 128, 128
+
+### (n_ele condition, [(upper limit on yz_cpus_l, layout), ...]), first matching row and tier wins
+_DECOMP_TABLE = (
+    (lambda n_ele: n_ele == 1, ((5, _decomp_single_64), (6, _decomp_single_mixed), (math.inf, _decomp_single_128))),
+    (lambda n_ele: n_ele <= 3, ((4, _decomp_low), (math.inf, _decomp_high))),
+    (lambda n_ele: n_ele == 4, ((3, _decomp_low), (math.inf, _decomp_nodes(4)))),
+    (lambda n_ele: n_ele == 5, ((3, _decomp_low), (math.inf, _decomp_nodes(3)))),
+    (lambda n_ele: n_ele in (6, 7), ((3, _decomp_low), (math.inf, _decomp_nodes(4)))),
+    (lambda n_ele: True, ((3, _decomp_low), (math.inf, _decomp_high))),
+)
+
+def _lookup_decomp(n_ele, yz_cpus_l, yz_cpus_h):
+    for matches, tiers in _DECOMP_TABLE:
+        if matches(n_ele):
+            for limit, layout in tiers:
+                if yz_cpus_l <= limit:
+                    return layout(n_ele, yz_cpus_l, yz_cpus_h)
+
 #####################################################################################################################################################################################
 
 ################################################################################### PARAMETRIC STUDY ################################################################################
@@ -694,56 +1111,56 @@ class SMHPCScheduling(HPCScheduling):
         base_case_dir = os.path.join(base_path, self.case_type)
 
         ## Copy base files and rename to current run accordingly
-        os.system(f'cp -r {base_case_dir}/* {self.path}')
-        os.system(f'mv {self.path}/base_SMX.f90 {self.path}/{self.run_name}_SMX.f90')
+        self.copy_base_case(base_case_dir, self.path, {'base_SMX.f90', 'Makefile', 'job_base.sh'})
+        os.rename(f'{self.path}/base_SMX.f90', f'{self.path}/{self.run_name}_SMX.f90')
         print('-' * 100)
         print(f'Run directory {self.path} created and base files copied')
 
         if self.case_type == 'geom' or self.case_type == 'sp_geom':
 
             ## Assign values to placeholders
-            os.system(f'sed -i \"s/\'pipe_radius\'/{self.pipe_radius}/\" {self.path}/{self.run_name}_SMX.f90')
-            os.system(f'sed -i \"s/\'smx_pos\'/{self.smx_pos}/\" {self.path}/{self.run_name}_SMX.f90')
-            os.system(f'sed -i \"s/\'bar_width\'/{self.bar_width}/g\" {self.path}/{self.run_name}_SMX.f90')
-            os.system(f'sed -i \"s/\'bar_thickness\'/{self.bar_thickness}/\" {self.path}/{self.run_name}_SMX.f90')
-            os.system(f'sed -i \"s/\'bar_angle\'/{self.bar_angle}/\" {self.path}/{self.run_name}_SMX.f90')
-            os.system(f'sed -i \"s/\'n_bars\'/{self.n_bars}/\" {self.path}/{self.run_name}_SMX.f90')
-            os.system(f'sed -i \"s/\'flowrate\'/{self.flowrate}/\" {self.path}/{self.run_name}_SMX.f90')
+            subs = {
+                "'pipe_radius'": self.pipe_radius,
+                "'smx_pos'": self.smx_pos,
+                "'bar_width'": self.bar_width,
+                "'bar_thickness'": self.bar_thickness,
+                "'bar_angle'": self.bar_angle,
+                "'n_bars'": self.n_bars,
+                "'flowrate'": self.flowrate}
 
             if self.case_type == 'geom':
-                os.system(f'sed -i \"s/\'d_per_level\'/{self.d_per_level}/\" {self.path}/{self.run_name}_SMX.f90')
-                os.system(f'sed -i \"s/\'n_levels\'/{self.n_levels}/\" {self.path}/{self.run_name}_SMX.f90')
-                os.system(f'sed -i \"s/\'d_radius\'/{self.d_radius}/\" {self.path}/{self.run_name}_SMX.f90')
+                subs.update({
+                    "'d_per_level'": self.d_per_level,
+                    "'n_levels'": self.n_levels,
+                    "'d_radius'": self.d_radius})
 
             else:
-                os.system(f'sed -i \"s/\'n_elements\'/{self.n_ele}/\" {self.path}/{self.run_name}_SMX.f90')
+                subs["'n_elements'"] = self.n_ele
 
-            os.system(f'sed -i \"s/\'flowrate\'/{self.flowrate}/\" {self.path}/{self.run_name}_SMX.f90')
+            self.fill_placeholders(f'{self.path}/{self.run_name}_SMX.f90', subs)
             print('-' * 100)
             print(f'Placeholders for geometry specs in {self.run_name}_SMX.f90 modified correctly')
         
         #modify the Makefile
 
-        os.system(f'sed -i s/file/{self.run_name}_SMX/g {self.path}/Makefile')
+        self.fill_placeholders(f'{self.path}/Makefile', {'file': f'{self.run_name}_SMX'})
 
         #compile the f90 into an executable
 
-        os.chdir(self.path)
-        subprocess.run('make',shell=True, capture_output=True, text=True, check=True)
+        subprocess.run(['make', '-j', str(os.cpu_count() or 1)], capture_output=True, text=True, check=True, cwd=self.path)
         print('-' * 100)
         print('Makefile created succesfully')
-        os.system(f'mv {self.run_name}_SMX.x {self.run_name}.x')
-        subprocess.run('make cleanall',shell=True, capture_output=True, text=True, check=True)
-        os.chdir('..')
+        os.rename(os.path.join(self.path, f'{self.run_name}_SMX.x'), os.path.join(self.path, f'{self.run_name}.x'))
+        subprocess.run(['make', 'cleanall'], capture_output=True, text=True, check=True, cwd=self.path)
 
     ### modifying .sh instance accordingly
     def setjobsh(self):
         
         ## rename job with current run
-        os.system(f'mv {self.path}/job_base.sh {self.path}/job_{self.run_name}.sh')
+        os.rename(f'{self.path}/job_base.sh', f'{self.path}/job_{self.run_name}.sh')
 
-        ## Assign values to placeholders
-        os.system(f'sed -i \"s/RUN_NAME/{self.run_name}/g\" {self.path}/job_{self.run_name}.sh')
+        ## Assign values to placeholders, rendered in one pass at the end
+        subs = {'RUN_NAME': self.run_name}
 
         ### If geometry variations are studied, construct domain and mesh specifications in job.sh accordingly
         if self.case_type == 'geom' or self.case_type == 'sp_geom':
@@ -769,213 +1186,75 @@ class SMHPCScheduling(HPCScheduling):
             box_4 = math.ceil(2*radius*1000)/1000
             box_6 = math.ceil(2*radius*1000)/1000
 
-            os.system(f'sed -i \"s/\'box2\'/{box_2}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'box4\'/{box_4}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'box6\'/{box_6}/\" {self.path}/job_{self.run_name}.sh')
+            subs.update({
+                "'box2'": box_2,
+                "'box4'": box_4,
+                "'box6'": box_6})
 
             ### High and low cell number cases
             yz_cpus_l = (min_res*d_pipe)/64
 
             yz_cpus_h = (min_res*d_pipe)/128
 
-            ### Two phase case with only one element
-            # Settings designed to operate with only one node in the short queue in the HPC
-            if n_ele == 1:
-                
-                if yz_cpus_l <= 5:
-                    xsub = math.ceil(yz_cpus_l)*2
-                    ysub = zsub = int(xsub/2)
-                    mem = 200 
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                elif yz_cpus_l <=6:
-                    xsub = math.ceil(yz_cpus_l)
-                    ysub = zsub = int(xsub)
-                    mem = 300 
-                    cell1 = 128
-                    cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                else:
-                    xsub = math.ceil(yz_cpus_h)
-                    ysub = zsub = int(xsub)
-                    mem = 768
-                    cell1 = cell2 = cell3 = 128
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-            ### Single phase case with multiple elements
-            ### First if looking for 64 cells and second else augmenting to 128 cell cases or moving the queue to capability to keep 64 as resolution
-            elif n_ele <=3:
-
-                if yz_cpus_l<=4:
-                    ysub = zsub = math.ceil(yz_cpus_l)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 200
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                else:
-                    ysub = zsub = math.ceil(yz_cpus_h)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 768
-                    cell1 = cell2 = cell3 = 128
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-            elif n_ele==4:
-                
-                if yz_cpus_l<=3:
-                    ysub = zsub = math.ceil(yz_cpus_l)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 200
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                else:
-                    ysub = zsub = 4
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 256
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub/4)
-                    n_nodes = 4
-
-            elif n_ele==5:
-                
-                if yz_cpus_l<=3:
-                    ysub = zsub = math.ceil(yz_cpus_l)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 200
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                else:
-                    ysub = zsub = 4
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 256
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub/3)
-                    n_nodes = 3
-
-            elif n_ele==6:
-                
-                if yz_cpus_l<=3:
-                    ysub = zsub = math.ceil(yz_cpus_l)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 200
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                else:
-                    ysub = zsub = 4
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 256
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub/4)
-                    n_nodes = 4
-
-            elif n_ele==7:
-
-                if yz_cpus_l<=3:
-                    ysub = zsub = math.ceil(yz_cpus_l)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 200
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                else:
-                    ysub = zsub = 4
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 256
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub/4)
-                    n_nodes = 4
-
-            else:
-
-                if yz_cpus_l<=3:
-                    ysub = zsub = math.ceil(yz_cpus_l)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 200
-                    cell1 = cell2 = cell3 = 64
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
-
-                else:
-                    ysub = zsub = math.ceil(yz_cpus_h)
-                    xsub = int(ysub*(n_ele+1))
-                    mem = 768
-                    cell1 = cell2 = cell3 = 128
-                    ncpus = int(xsub*ysub*zsub)
-                    n_nodes = 1
+            ### Subdomains, cpus, nodes, memory and cells per subdomain from the decomposition table
+            xsub, ysub, zsub, ncpus, n_nodes, mem, cell1, cell2, cell3 = _lookup_decomp(n_ele, yz_cpus_l, yz_cpus_h)
 
             ### Replacing placeholders in job.sh file after resolution calculations
-            os.system(f'sed -i \"s/\'x_subd\'/{xsub}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'y_subd\'/{ysub}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'z_subd\'/{zsub}/\" {self.path}/job_{self.run_name}.sh')
-
-            os.system(f'sed -i \"s/\'n_cpus\'/{ncpus}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'n_nodes\'/{n_nodes}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'mem\'/{mem}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'cell1\'/{cell1}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'cell2\'/{cell2}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'cell3\'/{cell3}/\" {self.path}/job_{self.run_name}.sh')
-
-            print('-' * 100)
-            print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
+            subs.update({
+                "'x_subd'": xsub,
+                "'y_subd'": ysub,
+                "'z_subd'": zsub,
+                "'n_cpus'": ncpus,
+                "'n_nodes'": n_nodes,
+                "'mem'": mem,
+                "'cell1'": cell1,
+                "'cell2'": cell2,
+                "'cell3'": cell3})
 
         elif self.case_type == 'surf':
 
             ### Replacing placeholders for surfactant parametric study with fixed geometry
-            os.system(f'sed -i \"s/\'diff1\'/{self.diff1}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'diff2\'/{self.diff2}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'ka\'/{self.ka}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'kd\'/{self.kd}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'ginf\'/{self.ginf}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'gini\'/{self.gini}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'diffs\'/{self.diffs}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'beta\'/{self.beta}/\" {self.path}/job_{self.run_name}.sh')
-
-            print('-' * 100)
-            print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
+            subs.update({
+                "'diff1'": self.diff1,
+                "'diff2'": self.diff2,
+                "'ka'": self.ka,
+                "'kd'": self.kd,
+                "'ginf'": self.ginf,
+                "'gini'": self.gini,
+                "'diffs'": self.diffs,
+                "'beta'": self.beta})
+
+        self.fill_placeholders(f'{self.path}/job_{self.run_name}.sh', subs)
+        print('-' * 100)
+        print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
 
     ### Converting vtk to vtr
-    def vtk_convert(self):
+    async def vtk_convert(self):
 
-        ### Move to ephemeral and create RESULTS saving folder
+        ### Ephemeral run folder and RESULTS saving folder
         ephemeral_path = os.path.join(os.environ['EPHEMERAL'],self.run_name)
-
-        os.chdir(ephemeral_path)
+        results_path = os.path.join(ephemeral_path,'RESULTS')
 
         try:
-            os.mkdir('RESULTS')
+            os.mkdir(results_path)
             print('-' * 100)
             print(f'RESULTS folder created in {ephemeral_path}')
         except FileExistsError:
             pass
 
-        ### Listing ISO and VAR vtks and pvds
-        ISO_file_list = glob.glob('ISO_*.vtk')
-        VAR_file_list = glob.glob('VAR_*_*.vtk')
-        PVD_file_list = glob.glob('VAR_*_time=*.pvd')
+        ### Listing ISO and VAR vtks and pvds in one pass
+        ISO_file_list, VAR_steps, PVD_file_list, last_vtk = self.scan_vtks(ephemeral_path)
         sorted_PVDs = sorted(PVD_file_list, key = lambda filename: 
                     float(filename.split('=')[-1].split('.pvd')[0]))
-        last_vtk = max(int(file.split("_")[-1].split(".")[0]) for file in VAR_file_list)
 
         ### First and last pvd file for pvpython processing
-        pvd_0file = glob.glob(f'VAR_{self.run_name}_time=0.00000E+00.pvd')[0]
+        pvd_0file = f'VAR_{self.run_name}_time=0.00000E+00.pvd'
+        if pvd_0file not in PVD_file_list:
+            raise FileNotFoundError(pvd_0file)
         pvd_ffile = sorted_PVDs[-1]
     
         ### Files to be converted, last time step in VAR
-        VAR_toconvert_list = glob.glob(f'VAR_*_{last_vtk}.vtk')
+        VAR_toconvert_list = VAR_steps.get(last_vtk, [])
         files_to_convert = ISO_file_list + VAR_toconvert_list
         file_count = len(files_to_convert)
 
@@ -984,22 +1263,19 @@ class SMHPCScheduling(HPCScheduling):
         if (ISO_file_list and VAR_toconvert_list):
 
             ### Moving files to RESULTS
-            for file in files_to_convert:
-                try:
-                    shutil.move(file,'RESULTS')
-                except (FileNotFoundError, shutil.Error) as e:
-                    print('-' * 100)
-                    print("====EXCEPTION====")
-                    print("FileNotFoundError")
-                    print('-' * 100)
-                    print(f"Exited with message :{e}, File or directory not found.")
-                    print('-' * 100)
-                    return
+            try:
+                self.move_files([os.path.join(ephemeral_path, file) for file in files_to_convert], results_path)
+            except (FileNotFoundError, shutil.Error) as e:
+                print('-' * 100)
+                marker(exception="FileNotFoundError")
+                print('-' * 100)
+                print(f"Exited with message :{e}, File or directory not found.")
+                print('-' * 100)
+                return
         ### If files don't exist, exit function and terminate pipeline
         else:
             print('-' * 100)
-            print("====EXCEPTION====")
-            print("FileNotFoundError")
+            marker(exception="FileNotFoundError")
             print('-' * 100)
             print("Either ISO or VAR files don't exist.")
             print('-' * 100)
@@ -1009,80 +1285,67 @@ class SMHPCScheduling(HPCScheduling):
         print('Convert files copied to RESULTS')
 
         ### Moving individual files of interest: pvd, csv
+        pvd_files = (pvd_0file,) if pvd_0file == pvd_ffile else (pvd_0file, pvd_ffile)
         try:
-            shutil.move(f'VAR_{self.run_name}.pvd','RESULTS')
-            shutil.move(f'ISO_static_1_{self.run_name}.pvd','RESULTS')
-            shutil.move(f'{self.run_name}.csv' if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv','RESULTS')
+            self.move_names((f'VAR_{self.run_name}.pvd', f'ISO_static_1_{self.run_name}.pvd', os.path.basename(self._csv_path())) + pvd_files,
+                            ephemeral_path, results_path)
             if pvd_0file == pvd_ffile:
-
-                shutil.move(f'{pvd_0file}', 'RESULTS')
                 print('Warning: No vtk timesteps were generated, adjust vtk timestep save. Pvpython calculatons will be performed from the initial state')
-            else:
-                shutil.move(f'{pvd_0file}', 'RESULTS')
-                shutil.move(f'{pvd_ffile}', 'RESULTS')
             print('-' * 100)
             print('VAR, ISO and csv files moved to RESULTS')
         except (FileNotFoundError, shutil.Error) as e:
             print('-' * 100)
-            print("====EXCEPTION====")
-            print("FileNotFoundError")
+            marker(exception="FileNotFoundError")
             print('-' * 100)
             print(f"Exited with message :{e}, File or directory not found.")
             print('-' * 100)
             return
 
         ### Cleaning previous restart from ephemeral
-        os.system('rm *rst')
+        self.remove_rst(ephemeral_path)
 
-        os.chdir('RESULTS')
 
+        ### VTK_SAVE and the convert scripts are created relative to one open RESULTS directory fd
+        results_fd = os.open(results_path, os.O_RDONLY | os.O_DIRECTORY)
         try:
-            os.mkdir('VTK_SAVE')
-        except FileExistsError:
-            pass
-
-        ### Finding, copying and modifying convert files into RESULTS
-        convert_scripts = glob.glob(os.path.join(self.convert_path, '*'))
+            try:
+                os.mkdir('VTK_SAVE', dir_fd=results_fd)
+            except FileExistsError:
+                pass
 
-        for file in convert_scripts:
+            ### Finding, copying and modifying convert files into RESULTS
             try:
-                shutil.copy2(file, '.')
-            except (FileNotFoundError, PermissionError, OSError):
-                print("====EXCEPTION====")
-                print("FileNotFoundError")
-                print(f"Failed to copy '{file}'.")
+                self.copy_convert_scripts(results_path, results_fd)
+            except OSError as e:
+                marker(exception="FileNotFoundError")
+                print(f"Failed to copy '{e.filename}'.")
                 return
+        finally:
+            os.close(results_fd)
 
-        os.system(f'sed -i \"s/\'FILECOUNT\'/{file_count}/\" Multithread_pool.py')
+        self.fill_placeholders(os.path.join(results_path,'Multithread_pool.py'), {"'FILECOUNT'": file_count})
 
         ### Submitting job convert and extracting job_id, wait time and status
-        jobid = self.submit_job(os.path.join(ephemeral_path,'RESULTS'),'convert')
+        jobid = await self.submit_job(results_path,'convert')
 
         print('-' * 100)
         print(f'JOB CONVERT from {self.run_name} submitted succesfully with ID {jobid}')
-        sleep(60)
+        await self._wait_for_job_visible(jobid, timeout=60)
 
         try:
-            t_jobwait, status, new_jobID = self.job_wait(jobid)
-            print("====JOB_IDS====")
-            print(new_jobID)
-            print("====JOB_STATUS====")
-            print(status)
+            t_jobwait, status, new_jobID = await self.job_wait(jobid)
+            marker(jobid=new_jobID, status=status)
             if status == 'Q' or status == 'H':
-                print("====WAIT_TIME====")
-                print(t_jobwait-1800)
+                marker(t_wait=t_jobwait-1800)
             elif status == 'R':
-                print("====WAIT_TIME====")
-                print(t_jobwait)
+                marker(t_wait=t_jobwait)
 
         except HPCScheduling.JobStatError:
             print(f'Convert job {self.run_ID} failed on initial submission')
-            print("====EXCEPTION====")
-            print("JobStatError")
+            marker(exception="JobStatError")
 
         except ValueError:
-            print("====EXCEPTION====")
-            print("ValueError")
+            marker(exception="ValueError")
 
 #####################################################################################################################################################################################
 
@@ -1135,219 +1398,203 @@ class SVHPCScheduling(HPCScheduling):
         base_case_dir = os.path.join(base_path, self.case_type)
 
         ### Copy base files and rename to current run accordingly ###
-        os.system(f'cp -r {base_case_dir}/* {self.path}')
-        os.system(f'mv {self.path}/base_SV.f90 {self.path}/{self.run_name}_SV.f90')
+        self.copy_base_case(base_case_dir, self.path, {'base_SV.f90', 'Makefile', 'job_base.sh'})
+        os.rename(f'{self.path}/base_SV.f90', f'{self.path}/{self.run_name}_SV.f90')
         print('-' * 100)
         print(f'Run directory {self.path} created and base files copied')
 
         if self.case_type == 'svgeom' or self.case_type == 'sp_svgeom':
             ### Assign values to placeholders ###
-            os.system(f'sed -i \"s/\'impeller_d\'/{self.impeller_d}/\" {self.path}/{self.run_name}_SV.f90')
-            os.system(f'sed -i \"s/\'frequency\'/{self.frequency}/\" {self.path}/{self.run_name}_SV.f90')
-            os.system(f'sed -i \"s/\'clearance\'/{self.clearance}/\" {self.path}/{self.run_name}_SV.f90')
-            os.system(f'sed -i \"s/\'blade_width\'/{self.blade_width}/\" {self.path}/{self.run_name}_SV.f90')
-            os.system(f'sed -i \"s/\'blade_thick\'/{self.blade_thick}/\" {self.path}/{self.run_name}_SV.f90')
-            os.system(f'sed -i \"s/\'nblades\'/{self.nblades}/\" {self.path}/{self.run_name}_SV.f90')
-            os.system(f'sed -i \"s/\'inclination\'/{self.inclination}/\" {self.path}/{self.run_name}_SV.f90')
+            self.fill_placeholders(f'{self.path}/{self.run_name}_SV.f90', {
+                "'impeller_d'": self.impeller_d,
+                "'frequency'": self.frequency,
+                "'clearance'": self.clearance,
+                "'blade_width'": self.blade_width,
+                "'blade_thick'": self.blade_thick,
+                "'nblades'": self.nblades,
+                "'inclination'": self.inclination})
 
         ### modify the Makefile ###
-        os.system(f'sed -i s/file/{self.run_name}_SV/g {self.path}/Makefile')
+        self.fill_placeholders(f'{self.path}/Makefile', {'file': f'{self.run_name}_SV'})
 
         ### compile the f90 into an executable ###
-        os.chdir(self.path)
-        subprocess.run('make',shell=True, capture_output=True, text=True, check=True)
+        subprocess.run(['make', '-j', str(os.cpu_count() or 1)], capture_output=True, text=True, check=True, cwd=self.path)
         print('-' * 100)
         print('Makefile created succesfully')
-        os.system(f'mv {self.run_name}_SV.x {self.run_name}.x')
-        subprocess.run('make cleanall',shell=True, capture_output=True, text=True, check=True)
-        os.chdir('..')
+        os.rename(os.path.join(self.path, f'{self.run_name}_SV.x'), os.path.join(self.path, f'{self.run_name}.x'))
+        subprocess.run(['make', 'cleanall'], capture_output=True, text=True, check=True, cwd=self.path)
 
     ### modifying .sh instance accordingly
         
     def setjobsh(self):
         ### rename job with current run ###
-        os.system(f'mv {self.path}/job_base.sh {self.path}/job_{self.run_name}.sh')
+        os.rename(f'{self.path}/job_base.sh', f'{self.path}/job_{self.run_name}.sh')
 
-        ### assign values to placeholders
-        os.system(f'sed -i \"s/RUN_NAME/{self.run_name}/g\" {self.path}/job_{self.run_name}.sh')
+        ### assign values to placeholders, rendered in one pass at the end ###
+        subs = {'RUN_NAME': self.run_name}
         
         ### replace placeholders for surfactant parametric study with fixed geometry ###
         if self.case_type == 'svsurf':
-            os.system(f'sed -i \"s/\'diff1\'/{self.diff1}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'diff2\'/{self.diff2}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'ka\'/{self.ka}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'kd\'/{self.kd}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'ginf\'/{self.ginf}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'gini\'/{self.gini}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'diffs\'/{self.diffs}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'beta\'/{self.beta}/\" {self.path}/job_{self.run_name}.sh')
-
-            print('-' * 100)
-            print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
+            subs.update({
+                "'diff1'": self.diff1,
+                "'diff2'": self.diff2,
+                "'ka'": self.ka,
+                "'kd'": self.kd,
+                "'ginf'": self.ginf,
+                "'gini'": self.gini,
+                "'diffs'": self.diffs,
+                "'beta'": self.beta})
 
         ### replace placeholders for output time interval for geometry parametric study ###
         else:
             opt = 1/32/float(self.frequency)
-            os.system(f'sed -i \"s/\'output_interval\'/{opt}/\" {self.path}/job_{self.run_name}.sh')
+            subs.update({"'output_interval'": opt})
 
-            print('-' * 100)
-            print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
+        self.fill_placeholders(f'{self.path}/job_{self.run_name}.sh', subs)
+        print('-' * 100)
+        print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
 
     ### Convert last vtk to vtr
             
-    def vtk_convert(self):
+    async def vtk_convert(self):
         ### vtk convert mode: last or all ###
         vtk_conv_mode = self.vtk_conv_mode
 
-        ### Move to ephemeral and create RESULTS saing folder ###
+        ### Ephemeral run folder and RESULTS saving folder ###
         ephemeral_path = os.path.join(os.environ['EPHEMERAL'],self.run_name)
-        os.chdir(ephemeral_path)
+        results_path = os.path.join(ephemeral_path,'RESULTS')
 
         try:
-            os.mkdir('RESULTS')
+            os.mkdir(results_path)
             print('-' * 100)
             print(f'RESULTS folder created in {ephemeral_path}')
         except FileExistsError:
             pass
         
-        ### Listing VAR vtks and pvds ###
-        VAR_file_list = glob.glob('VAR_*_*.vtk')
-        PVD_file_list = glob.glob('VAR_*_time=*.pvd')
+        ### Listing VAR vtks and pvds in one pass ###
+        _, VAR_steps, PVD_file_list, last_vtk = self.scan_vtks(ephemeral_path)
         sorted_PVDs = sorted(PVD_file_list, key = lambda filename: 
                     float(filename.split('=')[-1].split('.pvd')[0]))
-        last_vtk = max(int(file.split("_")[-1].split(".")[0]) for file in VAR_file_list)
 
         ### First and last pvd file for pvpython processing ###
-        pvd_0file = glob.glob(f'VAR_{self.run_name}_time=0.00000E+00.pvd')[0]
+        pvd_0file = f'VAR_{self.run_name}_time=0.00000E+00.pvd'
+        if pvd_0file not in PVD_file_list:
+            raise FileNotFoundError(pvd_0file)
         pvd_ffile = sorted_PVDs[-1]
 
         if vtk_conv_mode == 'last':
             ### Files to be converted, last time step in VAR
-            VAR_toconvert_list = glob.glob(f'VAR_*_{last_vtk}.vtk')
+            VAR_toconvert_list = VAR_steps.get(last_vtk, [])
             file_count = len(VAR_toconvert_list)
         
         else:
-            file_count = len(glob.glob(f'VAR_*_{last_vtk}.vtk'))
-            ### Files to be converted, all time step in VAR: from 320-720 (10-22.5 Rev.)
-            for filename in VAR_file_list:
-                try:
-                    timestep = int(filename.split('_')[-1].split('.vtk')[0])
-                except (ValueError, IndexError):
-                    # skip files that don't follow the expected naming convention
-                    continue
-
+            file_count = len(VAR_steps.get(last_vtk, []))
+            ### Files to be converted, all time step in VAR: from 320-720 (10-22.5 Rev.), steps already parsed by the scan
+            VAR_toconvert_list = []
+            for timestep, files in VAR_steps.items():
                 if timestep < 320 or timestep > 720:
-                    file_path = os.path.join(ephemeral_path, filename)
-                    os.remove(file_path)
-            VAR_toconvert_list = glob.glob('VAR_*_*.vtk')
+                    for filename in files:
+                        os.remove(os.path.join(ephemeral_path, filename))
+                else:
+                    VAR_toconvert_list.extend(files)
 
         ### Check if the files to be converted exist ###
         if VAR_toconvert_list:
             ### Moving files to RESULTS ###
-            for file in VAR_toconvert_list:
-                try:
-                    shutil.move(file, 'RESULTS')
-                except (FileNotFoundError, shutil.Error) as e:
-                    print('-' * 100)
-                    print("====EXCEPTION====")
-                    print("FileNotFoundError")
-                    print('-' * 100)
-                    print(f"Exited with message :{e}, File or directory not found.")
-                    print('-' * 100)
-                    return
+            try:
+                self.move_files([os.path.join(ephemeral_path, file) for file in VAR_toconvert_list], results_path)
+            except (FileNotFoundError, shutil.Error) as e:
+                print('-' * 100)
+                marker(exception="FileNotFoundError")
+                print('-' * 100)
+                print(f"Exited with message :{e}, File or directory not found.")
+                print('-' * 100)
+                return
             print('-' * 100)
             print('Convert files (320-720) copied to RESULTS')
         ### If files don't exit, exit function and terminate pipeline ###
         else:
             print('-' * 100)
-            print("====EXCEPTION====")
-            print("FileNotFoundError")
+            marker(exception="FileNotFoundError")
             print('-' * 100)
             print("VAR files don't exist.")
             print('-' * 100)
             return
 
         ### Moving individual files of interest: pvd, csv
+        if pvd_0file == pvd_ffile:
+            pvd_files = (pvd_0file,)
+        elif file_count == len(VAR_toconvert_list): # last time step
+            pvd_files = (pvd_0file, pvd_ffile)
+        else:
+            pvd_files = tuple(PVD_file_list)
+
         try:
-            shutil.move(f'VAR_{self.run_name}.pvd','RESULTS')
-            shutil.move(f'{self.run_name}.csv' if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv','RESULTS')
+            self.move_names((f'VAR_{self.run_name}.pvd', os.path.basename(self._csv_path())) + pvd_files,
+                            ephemeral_path, results_path)
             
             if pvd_0file == pvd_ffile:
-                shutil.move(f'{pvd_0file}', 'RESULTS')
                 print('Warning: No vtk timesteps were generated, adjust vtk timestep save. Pvpython calculatons will be performed from the initial state')
-            
-            elif file_count == len(VAR_toconvert_list): # last time step
-                shutil.move(f'{pvd_0file}', 'RESULTS')
-                shutil.move(f'{pvd_ffile}', 'RESULTS')
+            elif file_count == len(VAR_toconvert_list):
                 print("First and last pvd copied to RESULTS")
-            
             else:
-                [shutil.move(file, 'RESULTS') for file in PVD_file_list]
                 print("pvd for ALL time steps copied to RESULTS")
 
             print('-' * 100)
             print('VAR and csv files moved to RESULTS')
         except (FileNotFoundError, shutil.Error) as e:
             print('-' * 100)
-            print("====EXCEPTION====")
-            print("FileNotFoundError")
+            marker(exception="FileNotFoundError")
             print('-' * 100)
             print(f"Exited with message :{e}, File or directory not found.")
             print('-' * 100)
             return
         
         ### Cleaning previous restart and vtk from ephemeral
-        os.system('rm *rst')
+        self.remove_rst(ephemeral_path)
 
-        os.chdir('RESULTS')
 
+        ### VTK_SAVE and the convert scripts are created relative to one open RESULTS directory fd
+        results_fd = os.open(results_path, os.O_RDONLY | os.O_DIRECTORY)
         try:
-            os.mkdir('VTK_SAVE')
-        except FileExistsError:
-            pass
-
-        ### Finding, copying and modifying convert files into RESULTS
-        convert_scripts = glob.glob(os.path.join(self.convert_path, '*'))
+            try:
+                os.mkdir('VTK_SAVE', dir_fd=results_fd)
+            except FileExistsError:
+                pass
 
-        for file in convert_scripts:
+            ### Finding, copying and modifying convert files into RESULTS
             try:
-                shutil.copy2(file, '.')
-            except (FileNotFoundError, PermissionError, OSError):
-                print("====EXCEPTION====")
-                print("FileNotFoundError")
-                print(f"Failed to copy '{file}'.")
+                self.copy_convert_scripts(results_path, results_fd)
+            except OSError as e:
+                marker(exception="FileNotFoundError")
+                print(f"Failed to copy '{e.filename}'.")
                 return
+        finally:
+            os.close(results_fd)
 
-        os.system(f'sed -i \"s/\'FILECOUNT\'/{file_count}/\" Multithread_pool.py')
+        self.fill_placeholders(os.path.join(results_path,'Multithread_pool.py'), {"'FILECOUNT'": file_count})
 
         ### Submitting job convert and extracting job_id, wait time and status
-        jobid = self.submit_job(os.path.join(ephemeral_path,'RESULTS'),'convert')
+        jobid = await self.submit_job(results_path,'convert')
 
         print('-' * 100)
         print(f'JOB CONVERT from {self.run_name} submitted succesfully with ID {jobid}')
-        sleep(60)
+        await self._wait_for_job_visible(jobid, timeout=60)
 
         try:
-            t_jobwait, status, new_jobID = self.job_wait(jobid)
-            print("====JOB_IDS====")
-            print(new_jobID)
-            print("====JOB_STATUS====")
-            print(status)
+            t_jobwait, status, new_jobID = await self.job_wait(jobid)
+            marker(jobid=new_jobID, status=status)
             if status == 'Q' or status == 'H':
-                print("====WAIT_TIME====")
-                print(t_jobwait-1800)
+                marker(t_wait=t_jobwait-1800)
             elif status == 'R':
-                print("====WAIT_TIME====")
-                print(t_jobwait)
+                marker(t_wait=t_jobwait)
 
         except HPCScheduling.JobStatError:
             print(f'Convert job {self.run_ID} failed on initial submission')
-            print("====EXCEPTION====")
-            print("JobStatError")
+            marker(exception="JobStatError")
 
         except ValueError:
-            print("====EXCEPTION====")
-            print("ValueError")
+            marker(exception="ValueError")
 
 #####################################################################################################################################################################################
 
@@ -1388,89 +1635,88 @@ class IOHPCScheduling(HPCScheduling):
         base_case_dir = os.path.join(base_path, self.case_type)
 
         ### Copy base files and rename to current run accordingly ###
-        os.system(f'cp -r {base_case_dir}/* {self.path}')
-        os.system(f'mv {self.path}/int_osc_full.f90 {self.path}/{self.run_name}_IO.f90')
+        self.copy_base_case(base_case_dir, self.path, {'int_osc_full.f90', 'Makefile', 'job_base_osc_clean.sh'})
+        os.rename(f'{self.path}/int_osc_full.f90', f'{self.path}/{self.run_name}_IO.f90')
         print('-' * 100)
         print(f'Run directory {self.path} created and base files copied')
 
         if self.case_type == 'osc_clean':
             ### Assign values to placeholders ###
-            os.system(f'sed -i \"s/\'epsilon_val\'/{self.epsilon}/\" {self.path}/{self.run_name}_IO.f90')
-            os.system(f'sed -i \"s/\'wave_num_val\'/{self.k}/\" {self.path}/{self.run_name}_IO.f90')
+            self.fill_placeholders(f'{self.path}/{self.run_name}_IO.f90', {
+                "'epsilon_val'": self.epsilon,
+                "'wave_num_val'": self.k})
 
         ### modify the Makefile ###
-        os.system(f'sed -i s/file/{self.run_name}_IO/g {self.path}/Makefile')
+        self.fill_placeholders(f'{self.path}/Makefile', {'file': f'{self.run_name}_IO'})
 
         ### compile the f90 into an executable ###
-        os.chdir(self.path)
-        subprocess.run('make',shell=True, capture_output=True, text=True, check=True)
+        subprocess.run(['make', '-j', str(os.cpu_count() or 1)], capture_output=True, text=True, check=True, cwd=self.path)
         print('-' * 100)
         print('Makefile created succesfully')
-        os.system(f'mv {self.run_name}_IO.x {self.run_name}.x')
-        subprocess.run('make cleanall',shell=True, capture_output=True, text=True, check=True)
-        os.chdir('..')
+        os.rename(os.path.join(self.path, f'{self.run_name}_IO.x'), os.path.join(self.path, f'{self.run_name}.x'))
+        subprocess.run(['make', 'cleanall'], capture_output=True, text=True, check=True, cwd=self.path)
 
     ### modifying .sh instance accordingly
     def setjobsh(self):
         ### rename job with current run ###
-        os.system(f'mv {self.path}/job_base_osc_clean.sh {self.path}/job_{self.run_name}.sh')
+        os.rename(f'{self.path}/job_base_osc_clean.sh', f'{self.path}/job_{self.run_name}.sh')
 
-        ### assign values to placeholders
-        os.system(f'sed -i \"s/RUN_NAME/{self.run_name}/g\" {self.path}/job_{self.run_name}.sh')
+        ### assign values to placeholders, rendered in one pass at the end ###
+        subs = {'RUN_NAME': self.run_name}
         
         ### replace placeholders for surfactant parametric study with fixed geometry ###
         if self.case_type == 'osc_clean':
-            os.system(f'sed -i \"s/\'sigma_s_val\'/{self.sigma_s}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'rho_g_val\'/{self.rho_g}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'rho_l_val\'/{self.rho_l}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'mu_g_val\'/{self.mu_g}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'mu_l_val\'/{self.mu_l}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'grav_val\'/{self.gravity}/\" {self.path}/job_{self.run_name}.sh')
-            os.system(f'sed -i \"s/\'delta_t_sn_val\'/{self.delta_t_sn}/\" {self.path}/job_{self.run_name}.sh')
+            subs.update({
+                "'sigma_s_val'": self.sigma_s,
+                "'rho_g_val'": self.rho_g,
+                "'rho_l_val'": self.rho_l,
+                "'mu_g_val'": self.mu_g,
+                "'mu_l_val'": self.mu_l,
+                "'grav_val'": self.gravity,
+                "'delta_t_sn_val'": self.delta_t_sn})
+
+        self.fill_placeholders(f'{self.path}/job_{self.run_name}.sh', subs)
+        print('-' * 100)
+        print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
 
-            print('-' * 100)
-            print(f'Placeholders replaced succesfully in job.sh for run:{self.run_ID}')
-    
     ### Convert all vtks at the end of simulation ###
-    def vtk_convert(self):
+    async def vtk_convert(self):
 
-        ### Move to ephemeral and create RESULTS saing folder ###
+        ### Ephemeral run folder and RESULTS saving folder ###
         ephemeral_path = os.path.join(os.environ['EPHEMERAL'],self.run_name)
-        os.chdir(ephemeral_path)
+        results_path = os.path.join(ephemeral_path,'RESULTS')
 
         try:
-            os.mkdir('RESULTS')
+            os.mkdir(results_path)
             print('-' * 100)
             print(f'RESULTS folder created in {ephemeral_path}')
         except FileExistsError:
             pass
         
         # List of *vtk files to convert
-        VAR_toconvert_list = glob.glob('VAR_*_*.vtk')
-        ISO_toconvert_list = glob.glob('ISO_*_*.vtk')
+        ISO_file_list, VAR_steps, _, _ = self.scan_vtks(ephemeral_path)
+        VAR_toconvert_list = [file for files in VAR_steps.values() for file in files]
+        ISO_toconvert_list = [file for file in ISO_file_list if '_' in file[4:]]
         files_toconvert_list = VAR_toconvert_list + ISO_toconvert_list
         file_count = len(files_toconvert_list)
 
         ### Check if the files to be converted exist ###
         if files_toconvert_list:
             ### Moving files to RESULTS ###
-            for file in files_toconvert_list:
-                try:
-                    shutil.move(file, 'RESULTS')
-                except (FileNotFoundError, shutil.Error) as e:
-                    print('-' * 100)
-                    print("====EXCEPTION====")
-                    print("FileNotFoundError")
-                    print('-' * 100)
-                    print(f"Exited with message :{e}, File or directory not found.")
-                    print('-' * 100)
-                    return
+            try:
+                self.move_files([os.path.join(ephemeral_path, file) for file in files_toconvert_list], results_path)
+            except (FileNotFoundError, shutil.Error) as e:
+                print('-' * 100)
+                marker(exception="FileNotFoundError")
+                print('-' * 100)
+                print(f"Exited with message :{e}, File or directory not found.")
+                print('-' * 100)
+                return
             print('-' * 100)
         ### If files don't exit, exit function and terminate pipeline ###
         else:
             print('-' * 100)
-            print("====EXCEPTION====")
-            print("FileNotFoundError")
+            marker(exception="FileNotFoundError")
             print('-' * 100)
             print("Either ISO or VAR files don't exist.")
             print('-' * 100)
@@ -1481,84 +1727,80 @@ class IOHPCScheduling(HPCScheduling):
 
         ### Moving individual files of interest: pvd, csv
         try:
-            PVD_file_list = glob.glob('VAR_*.pvd') + glob.glob('ISO_*.pvd')
-            [shutil.move(file, 'RESULTS') for file in PVD_file_list]
-            shutil.copy2(f'{self.run_name}.csv' if os.path.exists(f'{self.run_name}.csv') else f'HST_{self.run_name}.csv','RESULTS')
+            PVD_file_list = [os.path.basename(file) for file in
+                             glob.glob(os.path.join(ephemeral_path, 'VAR_*.pvd')) + glob.glob(os.path.join(ephemeral_path, 'ISO_*.pvd'))]
+            self.move_names(PVD_file_list, ephemeral_path, results_path)
+            shutil.copy2(self._csv_path(), results_path)
             print("pvd for ALL time steps moved to RESULTS. csv file copied to RESULTS")
             print('-' * 100)
         except (FileNotFoundError, shutil.Error) as e:
             print('-' * 100)
-            print("====EXCEPTION====")
-            print("FileNotFoundError")
+            marker(exception="FileNotFoundError")
             print('-' * 100)
             print(f"Exited with message :{e}, File or directory not found.")
             print('-' * 100)
             return
 
-        os.chdir('RESULTS')
 
+        ### VTK_SAVE and the convert scripts are created relative to one open RESULTS directory fd
+        results_fd = os.open(results_path, os.O_RDONLY | os.O_DIRECTORY)
         try:
-            os.mkdir('VTK_SAVE')
-        except FileExistsError:
-            pass
-
-        ### Finding, copying and modifying convert files into RESULTS
-        convert_scripts = glob.glob(os.path.join(self.convert_path, '*'))
+            try:
+                os.mkdir('VTK_SAVE', dir_fd=results_fd)
+            except FileExistsError:
+                pass
 
-        for file in convert_scripts:
+            ### Finding, copying and modifying convert files into RESULTS
             try:
-                shutil.copy2(file, '.')
-            except (FileNotFoundError, PermissionError, OSError):
-                print("====EXCEPTION====")
-                print("FileNotFoundError")
-                print(f"Failed to copy '{file}'.")
+                self.copy_convert_scripts(results_path, results_fd)
+            except OSError as e:
+                marker(exception="FileNotFoundError")
+                print(f"Failed to copy '{e.filename}'.")
                 return
+        finally:
+            os.close(results_fd)
 
-        os.system(f'sed -i \"s/\'FILECOUNT\'/{file_count}/\" Multithread_pool.py')
-        os.system(f'sed -i \"s/\'case_name\'/{self.run_name}/\" job_convert.sh')
+        self.fill_placeholders(os.path.join(results_path,'Multithread_pool.py'), {"'FILECOUNT'": file_count})
+        self.fill_placeholders(os.path.join(results_path,'job_convert.sh'), {"'case_name'": self.run_name})
 
         ### Submitting job convert and extracting job_id, wait time and status
-        jobid = self.submit_job(os.path.join(ephemeral_path,'RESULTS'),'convert')
+        jobid = await self.submit_job(results_path,'convert')
 
         print('-' * 100)
         print(f'JOB CONVERT from {self.run_name} submitted succesfully with ID {jobid}')
-        sleep(60)
+        await self._wait_for_job_visible(jobid, timeout=60)
 
         try:
-            t_jobwait, status, new_jobID = self.job_wait(jobid)
-            print("====JOB_IDS====")
-            print(new_jobID)
-            print("====JOB_STATUS====")
-            print(status)
+            t_jobwait, status, new_jobID = await self.job_wait(jobid)
+            marker(jobid=new_jobID, status=status)
             if status == 'Q' or status == 'H':
-                print("====WAIT_TIME====")
-                print(t_jobwait - 1800)
+                marker(t_wait=t_jobwait - 1800)
             elif status == 'R':
-                print("====WAIT_TIME====")
-                print(t_jobwait)
+                marker(t_wait=t_jobwait)
 
         except HPCScheduling.JobStatError:
             print(f'Convert job {self.run_ID} failed on initial submission')
-            print("====EXCEPTION====")
-            print("JobStatError")
+            marker(exception="JobStatError")
 
         except ValueError:
-            print("====EXCEPTION====")
-            print("ValueError")
+            marker(exception="ValueError")
 
 
 def main():
+    ### Scheduling functions callable from the command line
+    functions = ("run","monitor","job_restart","vtk_convert")
+
     ### Argument parser to specify function to run
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "function",
-        choices=["run","monitor","job_restart","vtk_convert"], 
+        choices=functions, 
     )
 
-    ### Input argument for dictionary
+    ### Input argument for dictionary, '-' reads the JSON dictionary from stdin
     parser.add_argument(
         "--pdict",
-        type=json.loads,
+        type=str,
     )
 
     parser.add_argument(
@@ -1568,6 +1810,11 @@ def main():
 
     args = parser.parse_args()
 
+    if args.pdict == '-':
+        args.pdict = json.load(sys.stdin)
+    elif args.pdict is not None:
+        args.pdict = json.loads(args.pdict)
+
     ### choose class to run according to pdict given ###
     if args.study:
         if args.study == 'SV':
@@ -1579,11 +1826,12 @@ def main():
     else:
         print("No study ID provided. Double check run.py psweep script and pset_dict initialization")
 
-    if hasattr(simulator, args.function):
-        func = getattr(simulator, args.function)
-        func()
-    else:
-        print("Invalid function name")
+    ### argparse choices already validated the function name, so it is a single dict lookup
+    dispatch = {name: getattr(simulator, name) for name in functions}
+    result = dispatch[args.function]()
+    ### Scheduling functions are coroutines, each CLI call drives one of them on its own event loop
+    if asyncio.iscoroutine(result):
+        asyncio.run(result)
 
 if __name__ == "__main__":
     main()
@@ -11,19 +11,20 @@
 from paraview.simple import *
 import os
 import glob
-import pandas as pd
+import numpy as np
 import sys
 
 
-def pvdropDSD(HDpath,case_name):
+### Extracting droplet volumes from the last timestep, returned as NumPy arrays keyed by column name
+### Absolute paths only, so it can also run in-process from the local scheduler without changing directory
+def compute_dsd(HDpath,case_name):
 
     path = os.path.join(HDpath,case_name)
-    
-    os.chdir(path)
 
-    pvdfile = f'VAR_{case_name}_time=0.00000E+00.pvd'
+    pvdfile = os.path.join(path,f'VAR_{case_name}_time=0.00000E+00.pvd')
 
-    timestep = int(glob.glob('VAR_*_*.vtr')[0].split("_")[-1].split(".")[0])
+    vtrfile = os.path.basename(glob.glob(os.path.join(path,'VAR_*_*.vtr'))[0])
+    timestep = int(vtrfile.split("_")[-1].split(".")[0])
 
     old_suf = "_0.vtr"
     new_suf = f"_{timestep}.vtr"
@@ -80,10 +81,9 @@ def pvdropDSD(HDpath,case_name):
     lower_bound = int(region_range[0])
     upper_bound = int(region_range[1])
 
+    volumes = np.empty(upper_bound - lower_bound + 1, dtype=float)
 
-    volume_list = []
-
-    for j in range(lower_bound, upper_bound+1):
+    for idx, j in enumerate(range(lower_bound, upper_bound+1)):
 
         threshold1.UpperThreshold = j
         threshold1.LowerThreshold = j
@@ -93,19 +93,26 @@ def pvdropDSD(HDpath,case_name):
         integrateVariables1.DivideCellDataByVolume = 0
 
         volume_object = paraview.servermanager.Fetch(integrateVariables1)
-        volume = volume_object.GetCellData().GetArray('Volume').GetValue(0)
-        volume_list.append(volume)
+        volumes[idx] = volume_object.GetCellData().GetArray('Volume').GetValue(0)
 
-    volume_floats = [float(x) for x in volume_list]
+        # release the filter, the pipeline may live in the caller's process
+        Delete(integrateVariables1)
 
-    volume_df = pd.DataFrame(volume_floats, columns=['Volume'])
+    for proxy in (threshold1, connectivity, clip, mergeBlocks, case_data):
+        Delete(proxy)
 
     print('Volumes extracted correctly from integrate variables')
 
-   
-    df_json = volume_df.to_json(orient='split', double_precision=15)
+    return {'Volume': volumes}
+
+### pvpython entry point: same extraction, saved as a binary .npz in the run folder for the local scheduler
+def pvdropDSD(HDpath,case_name):
+
+    npz_path = os.path.join(HDpath,case_name,f'DSD_{case_name}.npz')
+
+    np.savez(npz_path, **compute_dsd(HDpath,case_name))
 
-    return df_json
+    return npz_path
 
 if __name__ == "__main__":
 
@@ -113,9 +120,6 @@ if __name__ == "__main__":
     
     case_name = sys.argv[2]
 
-    df_bytes = pvdropDSD(HDpath,case_name)
-
-    print(df_bytes)
-
-
+    npz_path = pvdropDSD(HDpath,case_name)
 
+    print(npz_path)
@@ -1,5 +1,6 @@
 import subprocess
 import pandas as pd
+import numpy as np
 import glob
 import os
 
@@ -39,7 +40,9 @@ def post_process():
             if i < len(captured_stdout) - 1:
                 print(stripline)
         
-        df_DSD = pd.read_json(outlines[-1], orient='split', dtype=float, precise_float=True)
+        ### Droplet volumes come back as a binary .npz, its path printed last by the script
+        with np.load(outlines[-1]) as dsd_data:
+            df_DSD = pd.DataFrame({key: dsd_data[key] for key in dsd_data.files})
 
     except subprocess.CalledProcessError as e:
         print(f"Error executing the script with pvpython: {e}")
@@ -0,0 +1,60 @@
+### Convergence kernel checks against the pandas path, including csv rows with nan and inf values
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import HPC_run_scheduling as hpc
+
+### pure python kernels, plus the numba compiled ones when numba is installed
+rolling_means = [getattr(hpc._strided_rolling_mean, 'py_func', hpc._strided_rolling_mean)]
+kernels = [hpc._convergence_loops]
+if hpc._convergence_kernel is not None:
+    rolling_means.append(hpc._strided_rolling_mean)
+    kernels.append(hpc._convergence_kernel)
+
+
+def pandas_rolling_mean(x, window, step):
+    return pd.Series(x).rolling(window=window).mean()[::step].dropna().values
+
+
+def with_nonfinite(rng, n, positions):
+    x = rng.random(n) + 0.5
+    for i, value in positions:
+        x[i] = value
+    return x
+
+
+@pytest.mark.parametrize('rolling_mean', rolling_means)
+@pytest.mark.parametrize('window,step', [(1, 1), (3, 1), (5, 2), (10, 3)])
+def test_rolling_mean_recovers_after_nonfinite(rolling_mean, window, step):
+    rng = np.random.default_rng(0)
+    x = with_nonfinite(rng, 60, [(4, np.nan), (17, np.inf), (18, -np.inf), (30, np.nan), (31, np.inf), (59, np.nan)])
+
+    expected = pandas_rolling_mean(x, window, step)
+    result = rolling_mean(x, window, step)
+
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('kernel', kernels)
+@pytest.mark.parametrize('nonfinite', [np.nan, np.inf])
+def test_kernel_matches_numpy_path(kernel, nonfinite):
+    rng = np.random.default_rng(1)
+    n = 200
+    dt_CFL = rng.random(n) + 1.0
+    dt = rng.random(n) * 1.5
+    div = with_nonfinite(rng, n, [(20, nonfinite), (120, nonfinite)])
+    ke = with_nonfinite(rng, n, [(50, nonfinite), (51, nonfinite), (190, nonfinite)])
+
+    args = (dt_CFL, dt, div, ke, 10, 5, 0.05, 0.01)
+    with np.errstate(all='ignore'):
+        expected = hpc.HPCScheduling._convergence_numpy(*args)
+        result = kernel(*args)
+
+    assert tuple(bool(value) for value in result) == tuple(bool(value) for value in expected)